@@ -0,0 +1,85 @@
+"""add_hot_path_indexes
+
+Revision ID: 438c37b0b351
+Revises: 8c4f1a7e2b6d
+Create Date: 2026-10-17 20:05:41.218304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '438c37b0b351'
+down_revision: Union[str, None] = '8c4f1a7e2b6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IN_PROGRESS = sa.text("status = 'IN_PROGRESS'")
+
+# (name, table, columns, extra create_index kwargs); mirrors the Index()/index=True declarations on the models
+INDEXES = [
+    ("uq_student_exam_attempts_in_progress", "student_exam_attempts", ["student_id", "exam_bundle_id"],
+     {"unique": True, "postgresql_where": IN_PROGRESS, "sqlite_where": IN_PROGRESS}),
+    ("ix_student_exam_attempts_student_id_start_time", "student_exam_attempts", ["student_id", "start_time"], {}),
+    ("ix_student_answers_student_exam_attempt_id", "student_answers", ["student_exam_attempt_id"], {}),
+    ("ix_practice_sessions_student_id_start_time", "practice_sessions", ["student_id", "start_time"], {}),
+    ("ix_practice_session_answers_practice_session_id", "practice_session_answers", ["practice_session_id"], {}),
+    ("ix_questions_subject_id_id", "questions", ["subject_id", "id"], {}),
+    ("ix_questions_subject_id_type_year_id", "questions", ["subject_id", "type", "year", "id"], {}),
+    ("ix_students_student_class_id", "students", ["student_class_id"], {}),
+    ("ix_exam_bundle_questions_question_id", "exam_bundle_questions", ["question_id", "exam_bundle_id"], {}),
+    ("ix_exam_bundle_student_classes_student_class_id", "exam_bundle_student_classes",
+     ["student_class_id", "exam_bundle_id"], {}),
+]
+
+
+def _existing_indexes():
+    """{table: {index names}} for the tables above that exist; fresh databases get them from create_all."""
+    inspector = sa.inspect(op.get_bind())
+    tables = {table for _, table, _, _ in INDEXES}
+    return {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for table in tables
+        if inspector.has_table(table)
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing_indexes()
+
+    attempt_indexes = existing.get("student_exam_attempts")
+    if attempt_indexes is not None and "uq_student_exam_attempts_in_progress" not in attempt_indexes:
+        # The old check-then-insert could race; keep the newest in-progress attempt per student
+        # and bundle and close the rest so the unique index can be built
+        op.execute(
+            """
+            UPDATE student_exam_attempts SET status = 'COMPLETED'
+            WHERE status = 'IN_PROGRESS' AND EXISTS (
+                SELECT 1 FROM student_exam_attempts AS newer
+                WHERE newer.student_id = student_exam_attempts.student_id
+                  AND newer.exam_bundle_id = student_exam_attempts.exam_bundle_id
+                  AND newer.status = 'IN_PROGRESS'
+                  AND (newer.start_time, newer.id) > (student_exam_attempts.start_time, student_exam_attempts.id)
+            )
+            """
+        )
+
+    # CONCURRENTLY (Postgres) so the hot tables stay writable while the indexes build;
+    # it can't run inside the migration transaction, hence the autocommit block
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            if table in existing and name not in existing[table]:
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            if name in existing.get(table, set()):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
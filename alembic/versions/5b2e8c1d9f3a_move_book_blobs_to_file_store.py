@@ -0,0 +1,106 @@
+"""move_book_blobs_to_file_store
+
+Revision ID: 5b2e8c1d9f3a
+Revises: 164a81a067be
+Create Date: 2026-10-17 10:12:41.204311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.storage import get_blob_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8c1d9f3a'
+down_revision: Union[str, None] = '164a81a067be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 50
+
+
+def _book_columns():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("books"):
+        return None  # fresh database: create_all builds the new layout
+    return {column["name"] for column in inspector.get_columns("books")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = _book_columns()
+    if columns is None or "pdf" not in columns:
+        return
+
+    op.add_column("books", sa.Column("cover_image_key", sa.String(length=64), nullable=True))
+    op.add_column("books", sa.Column("cover_image_size", sa.Integer(), nullable=True))
+    op.add_column("books", sa.Column("cover_image_mime", sa.String(), nullable=True))
+    op.add_column("books", sa.Column("pdf_key", sa.String(length=64), nullable=True))
+    op.add_column("books", sa.Column("pdf_size", sa.Integer(), nullable=True))
+    op.add_column("books", sa.Column("pdf_mime", sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    store = get_blob_store()
+    books = sa.table(
+        "books",
+        sa.column("id"), sa.column("cover_image", sa.LargeBinary), sa.column("pdf", sa.LargeBinary),
+        sa.column("cover_image_key"), sa.column("cover_image_size"), sa.column("cover_image_mime"),
+        sa.column("pdf_key"), sa.column("pdf_size"), sa.column("pdf_mime"),
+    )
+    pending = (books.c.cover_image.isnot(None) & books.c.cover_image_key.is_(None)) | (
+        books.c.pdf.isnot(None) & books.c.pdf_key.is_(None)
+    )
+    # Move blobs a few rows at a time so a large library never sits in memory at once
+    while True:
+        rows = bind.execute(
+            sa.select(books.c.id, books.c.cover_image, books.c.pdf).where(pending).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for book_id, cover_image, pdf in rows:
+            values = {}
+            if cover_image is not None:
+                blob = store.put(bytes(cover_image))
+                values.update(cover_image_key=blob.key, cover_image_size=blob.size, cover_image_mime="image/jpeg")
+            if pdf is not None:
+                blob = store.put(bytes(pdf))
+                values.update(pdf_key=blob.key, pdf_size=blob.size, pdf_mime="application/pdf")
+            bind.execute(books.update().where(books.c.id == book_id).values(**values))
+
+    op.drop_column("books", "cover_image")
+    op.drop_column("books", "pdf")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _book_columns()
+    if columns is None or "pdf_key" not in columns:
+        return
+
+    op.add_column("books", sa.Column("cover_image", sa.LargeBinary(), nullable=True))
+    op.add_column("books", sa.Column("pdf", sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    store = get_blob_store()
+    books = sa.table(
+        "books",
+        sa.column("id"), sa.column("cover_image", sa.LargeBinary), sa.column("pdf", sa.LargeBinary),
+        sa.column("cover_image_key"), sa.column("pdf_key"),
+    )
+    rows = bind.execute(
+        sa.select(books.c.id, books.c.cover_image_key, books.c.pdf_key)
+        .where(books.c.cover_image_key.isnot(None) | books.c.pdf_key.isnot(None))
+    ).all()
+    for book_id, cover_image_key, pdf_key in rows:
+        bind.execute(
+            books.update().where(books.c.id == book_id).values(
+                cover_image=store.read(cover_image_key) if cover_image_key else None,
+                pdf=store.read(pdf_key) if pdf_key else None,
+            )
+        )
+
+    for column in ("cover_image_key", "cover_image_size", "cover_image_mime", "pdf_key", "pdf_size", "pdf_mime"):
+        op.drop_column("books", column)
@@ -0,0 +1,42 @@
+"""add_book_cover_renditions
+
+Revision ID: 8c4f1a7e2b6d
+Revises: 5b2e8c1d9f3a
+Create Date: 2026-10-17 14:02:19.733105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1a7e2b6d'
+down_revision: Union[str, None] = '5b2e8c1d9f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _book_columns():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("books"):
+        return None  # fresh database: create_all builds the new layout
+    return {column["name"] for column in inspector.get_columns("books")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = _book_columns()
+    if columns is None or "cover_renditions" in columns:
+        return
+    # Existing covers keep serving their single 300px JPEG until the book's cover is re-uploaded
+    op.add_column("books", sa.Column("cover_renditions", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _book_columns()
+    if columns is None or "cover_renditions" not in columns:
+        return
+    op.drop_column("books", "cover_renditions")
@@ -0,0 +1,57 @@
+"""add_book_blobs
+
+Revision ID: a9c5e2f7d4b1
+Revises: e4a6c2d8f1b3
+Create Date: 2026-10-18 09:14:52.306418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c5e2f7d4b1'
+down_revision: Union[str, None] = 'e4a6c2d8f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+books = sa.table(
+    "books",
+    sa.column("id", sa.Uuid()),
+    sa.column("cover_image_key", sa.String()),
+    sa.column("pdf_key", sa.String()),
+    sa.column("cover_renditions", sa.JSON()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("books") or inspector.has_table("book_blobs"):
+        return  # fresh database: create_all builds the table
+    book_blobs = op.create_table(
+        "book_blobs",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("book_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("key", "book_id"),
+    )
+    op.create_index("ix_book_blobs_book_id", "book_blobs", ["book_id"])
+
+    # Rendition keys only exist inside the JSON column, so the backfill reads the books in Python
+    rows = []
+    for book in op.get_bind().execute(sa.select(books)):
+        keys = {book.cover_image_key, book.pdf_key}
+        keys |= {rendition["key"] for rendition in (book.cover_renditions or {}).values()}
+        rows += [{"key": key, "book_id": book.id} for key in keys if key]
+    if rows:
+        op.bulk_insert(book_blobs, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("book_blobs"):
+        op.drop_index("ix_book_blobs_book_id", table_name="book_blobs")
+        op.drop_table("book_blobs")
@@ -0,0 +1,72 @@
+"""unique_student_answer_per_question
+
+Revision ID: b7d3e91f0c42
+Revises: 438c37b0b351
+Create Date: 2026-10-17 21:12:09.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e91f0c42'
+down_revision: Union[str, None] = '438c37b0b351'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNIQUE_INDEX = "uq_student_answers_attempt_question"
+# Superseded: the unique index leads with the same column
+OLD_INDEX = "ix_student_answers_student_exam_attempt_id"
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("student_answers"):
+        return None  # fresh database: create_all builds the table with its indexes
+    return {index["name"] for index in inspector.get_indexes("student_answers")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing_indexes()
+    if existing is None:
+        return
+
+    if UNIQUE_INDEX not in existing:
+        # Submit always rejected duplicate questions, but keep the newest row per question
+        # in case any slipped in, so the unique index can be built
+        op.execute(
+            """
+            DELETE FROM student_answers
+            WHERE EXISTS (
+                SELECT 1 FROM student_answers AS newer
+                WHERE newer.student_exam_attempt_id = student_answers.student_exam_attempt_id
+                  AND newer.question_id = student_answers.question_id
+                  AND (newer.created_at, newer.id) > (student_answers.created_at, student_answers.id)
+            )
+            """
+        )
+
+    with op.get_context().autocommit_block():
+        if UNIQUE_INDEX not in existing:
+            op.create_index(
+                UNIQUE_INDEX, "student_answers", ["student_exam_attempt_id", "question_id"],
+                unique=True, postgresql_concurrently=True,
+            )
+        if OLD_INDEX in existing:
+            op.drop_index(OLD_INDEX, table_name="student_answers", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing_indexes()
+    if existing is None:
+        return
+    with op.get_context().autocommit_block():
+        if OLD_INDEX not in existing:
+            op.create_index(OLD_INDEX, "student_answers", ["student_exam_attempt_id"], postgresql_concurrently=True)
+        if UNIQUE_INDEX in existing:
+            op.drop_index(UNIQUE_INDEX, table_name="student_answers", postgresql_concurrently=True)
@@ -0,0 +1,56 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c6d1f4a8b2e9
+Revises: a9c5e2f7d4b1
+Create Date: 2026-10-18 10:02:37.541920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6d1f4a8b2e9'
+down_revision: Union[str, None] = 'a9c5e2f7d4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table); every /all listing orders by (created_at, id). Admins, teachers and students
+# page through users' created_at, so the users index serves them too
+INDEXES = [
+    ("ix_users_created_at_id", "users"),
+    ("ix_books_created_at_id", "books"),
+    ("ix_subjects_created_at_id", "subjects"),
+    ("ix_questions_created_at_id", "questions"),
+    ("ix_exam_bundles_created_at_id", "exam_bundles"),
+]
+
+
+def _existing_indexes():
+    """{table: {index names}} for the tables above that exist; fresh databases get them from create_all."""
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for _, table in INDEXES
+        if inspector.has_table(table)
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            if table in existing and name not in existing[table]:
+                op.create_index(name, table, ["created_at", "id"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            if name in existing.get(table, set()):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
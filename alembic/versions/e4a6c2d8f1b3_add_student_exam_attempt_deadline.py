@@ -0,0 +1,59 @@
+"""add_student_exam_attempt_deadline
+
+Revision ID: e4a6c2d8f1b3
+Revises: b7d3e91f0c42
+Create Date: 2026-10-17 22:31:47.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6c2d8f1b3'
+down_revision: Union[str, None] = 'b7d3e91f0c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_student_exam_attempts_in_progress_deadline"
+IN_PROGRESS = sa.text("status = 'IN_PROGRESS'")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("student_exam_attempts"):
+        return  # fresh database: create_all builds the table with the column and index
+
+    if "deadline" not in {column["name"] for column in inspector.get_columns("student_exam_attempts")}:
+        op.add_column("student_exam_attempts", sa.Column("deadline", sa.DateTime(timezone=True), nullable=True))
+        # Attempts already underway get the deadline they would have been given at start
+        op.execute(
+            """
+            UPDATE student_exam_attempts SET deadline = start_time + (
+                SELECT time_in_mins FROM exam_bundles WHERE exam_bundles.id = student_exam_attempts.exam_bundle_id
+            )
+            WHERE status = 'IN_PROGRESS'
+            """
+        )
+
+    if INDEX not in {index["name"] for index in inspector.get_indexes("student_exam_attempts")}:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                INDEX, "student_exam_attempts", ["deadline"],
+                postgresql_where=IN_PROGRESS, sqlite_where=IN_PROGRESS, postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("student_exam_attempts"):
+        return
+    if INDEX in {index["name"] for index in inspector.get_indexes("student_exam_attempts")}:
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX, table_name="student_exam_attempts", postgresql_concurrently=True)
+    if "deadline" in {column["name"] for column in inspector.get_columns("student_exam_attempts")}:
+        op.drop_column("student_exam_attempts", "deadline")
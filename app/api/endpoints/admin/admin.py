@@ -1,11 +1,13 @@
-from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException, Response
 from app.core.dependencies import get_db
 from app.models.user import User
 from app.models.admin import Admin
 from app.schemas.admin import AdminSchema, AdminCreate
 from app.api.endpoints.user.functions import get_current_admin_user
-from app.api.endpoints.user.functions import get_password_hash
+from app.api.endpoints.user.functions import get_password_hash, revoke_user_status
+from sqlalchemy import select
 from sqlalchemy.orm import Session 
+from app.utils import pagination, stats
 from typing import List
 from app.utils.constant.globals import UserRole
 
@@ -34,6 +36,7 @@ def create_admin(admin: AdminCreate, db: Session = Depends(get_db), current_user
     )
     db.add(db_admin)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(db_admin)
     return db_admin
 
@@ -45,9 +48,8 @@ def read_admin(admin_id: int, db: Session = Depends(get_db), current_user: User
     return db_admin
 
 @router.get("/admins/", response_model=List[AdminSchema])
-def read_admins(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin_user)):
-    admins = db.query(Admin).offset(skip).limit(limit).all()
-    return admins
+def read_admins(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db), current_user: User = Depends(get_current_admin_user)):
+    return pagination.paginate(db, select(Admin), Admin, page, response)
 
 @router.put("/admins/{admin_id}", response_model=AdminSchema)
 def update_admin(
@@ -89,4 +91,6 @@ def delete_admin(
 
     db.delete(db_admin)
     db.commit()
+    stats.invalidate_counts()
+    revoke_user_status(db_admin.id)
     return db_admin
\ No newline at end of file
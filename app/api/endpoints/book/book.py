@@ -1,59 +1,143 @@
-from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException, Response
+from fastapi import APIRouter, status, Depends, UploadFile, File, Form, HTTPException, Request, Query, Response
 from app.core.dependencies import get_db
-from app.models.book import Book
+from app.models.book import Book, book_blobs
 from app.models.user import User
-from app.schemas.book import BookCreate, BookSchema
+from app.schemas.book import BookSchema
 from app.api.endpoints.user.functions import get_current_active_user
-from sqlalchemy.orm import Session 
-from io import BytesIO 
-from PIL import Image
-from typing import List
+from app.core.storage import BlobStore, get_blob_store
+from app.core.settings import settings
+from app.utils.streaming import blob_response
+from app.utils import images, pagination
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session, selectinload
+from contextlib import contextmanager
+from typing import Annotated, List, Optional
 from uuid import UUID
 
 router = APIRouter(prefix="/book", tags=['Books'])
 
+
+def _lock_blobs(db: Session, keys, shared: bool):
+    """
+    Takes transaction-scoped advisory locks on blob keys, in key order. Uploads hold them shared
+    from before `put` until their commit; releases hold them exclusively while re-checking for
+    references, so a blob can't be deleted under a book that is about to point at it.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    lock = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    for key in sorted({k for k in keys if k}):
+        db.execute(text(f"SELECT {lock}(:id)"), {"id": BlobStore.lock_id(key)})
+
+
+def _set_cover_image(db: Session, db_book: Book, cover_image: UploadFile):
+    # read one byte past the cap so oversized uploads are caught without buffering them whole
+    content = cover_image.file.read(settings.MAX_COVER_UPLOAD_BYTES + 1)
+    if len(content) > settings.MAX_COVER_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Cover image must be at most {settings.MAX_COVER_UPLOAD_BYTES // (1024 * 1024)} MB",
+        )
+    try:
+        rendered = images.image_executor.submit(images.render_renditions, content).result()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cover image file")
+    _lock_blobs(db, [BlobStore.key_for(data) for data, _ in rendered.values()], shared=True)
+    renditions = {}
+    for name, (data, mime) in rendered.items():
+        blob = get_blob_store().put(data)
+        renditions[name] = {"key": blob.key, "size": blob.size, "mime": mime}
+
+    default = renditions[images.rendition_name("thumb", "jpeg")]
+    db_book.cover_image_key, db_book.cover_image_size, db_book.cover_image_mime = default["key"], default["size"], default["mime"]
+    db_book.cover_renditions = renditions
+
+
+def _blob_keys(db_book: Book) -> set:
+    keys = {db_book.cover_image_key, db_book.pdf_key} | {r["key"] for r in (db_book.cover_renditions or {}).values()}
+    return {key for key in keys if key}
+
+
+def _save_blob_refs(db: Session, db_book: Book):
+    """Rewrites the book's rows in book_blobs; flushes first so a new book has its id."""
+    db.flush()
+    db.execute(delete(book_blobs).where(book_blobs.c.book_id == db_book.id))
+    keys = _blob_keys(db_book)
+    if keys:
+        db.execute(insert(book_blobs), [{"key": key, "book_id": db_book.id} for key in keys])
+
+
+@contextmanager
+def _releasing_on_failure(db: Session, db_book: Book):
+    """Rolls back and releases the blobs the block stored for `db_book` if saving it fails."""
+    previous = _blob_keys(db_book)
+    try:
+        yield
+    except BaseException:
+        stored = _blob_keys(db_book) - previous  # read before the rollback expires db_book
+        db.rollback()
+        _release_blobs(db, stored)
+        raise
+
+
+def _set_pdf(db: Session, db_book: Book, content: bytes):
+    _lock_blobs(db, [BlobStore.key_for(content)], shared=True)
+    blob = get_blob_store().put(content)
+    db_book.pdf_key, db_book.pdf_size, db_book.pdf_mime = blob.key, blob.size, "application/pdf"
+
+
+def _release_blobs(db: Session, keys):
+    """Deletes blobs that no book references any more (identical uploads share one blob)."""
+    keys = {k for k in keys if k}
+    _lock_blobs(db, keys, shared=False)
+    if keys:
+        still_used = set(db.execute(select(book_blobs.c.key).where(book_blobs.c.key.in_(keys))).scalars())
+        for key in keys - still_used:
+            get_blob_store().delete(key)
+    db.commit()  # ends the transaction, releasing the locks
+
+# Create, update and delete are plain `def`: they hash and write blobs and wait on blob locks
+# (see _lock_blobs) while holding a transaction, which must block a threadpool thread, never the
+# event loop. A release waiting there for an upload's lock would otherwise stop that upload from
+# ever reaching its commit, and every other request on the worker with it.
 @router.post("/create", response_model=BookSchema, status_code=status.HTTP_201_CREATED)
-async def create_book(
-    book: BookCreate,
+def create_book(
+    name: Annotated[str, Form()],  # a form field: the request is multipart, alongside the files
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     cover_image: UploadFile = File(None),  # Optional file upload
     pdf_file: UploadFile = File(None),  # Optional file upload
 ):
     db_book = Book(
-        name=book.name, uploaded_by_id=current_user.id
+        name=name, uploaded_by_id=current_user.id
     ) 
 
-    if cover_image:
-        # Basic image validation (content type and size)
-        if not cover_image.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=400, detail="Invalid cover image file type"
-            )
-        #  resize image
-        image_content = await cover_image.read()  # Read the file content
-        img = Image.open(BytesIO(image_content))
-        img.thumbnail((300, 300))  # Resize to a reasonable size
-        img_byte_arr = BytesIO()
-        img.save(img_byte_arr, format='JPEG')  # Save the resized image
-        db_book.cover_image = img_byte_arr.getvalue()
-
-    if pdf_file:
-        if pdf_file.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Invalid PDF file type")
-        pdf_content = await pdf_file.read()
-        db_book.pdf = pdf_content
-
-    db.add(db_book)
-    db.commit()
+    with _releasing_on_failure(db, db_book):
+        if cover_image:
+            # Basic image validation (content type and size)
+            if not cover_image.content_type.startswith("image/"):
+                raise HTTPException(
+                    status_code=400, detail="Invalid cover image file type"
+                )
+            _set_cover_image(db, db_book, cover_image)
+
+        if pdf_file:
+            if pdf_file.content_type != "application/pdf":
+                raise HTTPException(status_code=400, detail="Invalid PDF file type")
+            pdf_content = pdf_file.file.read()
+            _set_pdf(db, db_book, pdf_content)
+
+        db.add(db_book)
+        _save_blob_refs(db, db_book)
+        db.commit()
     db.refresh(db_book)
     return db_book
 
 
 @router.get("/all", response_model=List[BookSchema])
-def read_books(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    books = db.query(Book).offset(skip).limit(limit).all()
-    return books
+def read_books(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    # likes feed likes_count; load them for the whole page in one query
+    return pagination.paginate(db, select(Book).options(selectinload(Book.likes)), Book, page, response)
 
 
 @router.get("/{book_id}", response_model=BookSchema)
@@ -66,9 +150,9 @@ def read_book(book_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.put("/update/{book_id}", response_model=BookSchema)
-async def update_book(
+def update_book(
     book_id: UUID,
-    book: BookCreate,
+    name: Annotated[str, Form()],  # a form field: the request is multipart, alongside the files
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     cover_image: UploadFile = File(None),  # Optional file upload
@@ -83,35 +167,34 @@ async def update_book(
             status_code=403, detail="Not authorized to update this book"
         )
 
-    db_book.name = book.name
-
-    if cover_image:
-        # Basic image validation (content type and size)
-        if not cover_image.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=400, detail="Invalid cover image file type"
-            )
-        image_content = await cover_image.read()
-        img = Image.open(BytesIO(image_content))
-        img.thumbnail((300, 300))
-        img_byte_arr = BytesIO()
-        img.save(img_byte_arr, format='JPEG')
-        db_book.cover_image = img_byte_arr.getvalue()
-
-    if pdf_file:
-        if pdf_file.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Invalid PDF file type")
-        pdf_content = await pdf_file.read()
-        db_book.pdf = pdf_content
-
-    db.commit()
+    db_book.name = name
+    previous_keys = _blob_keys(db_book)
+
+    with _releasing_on_failure(db, db_book):
+        if cover_image:
+            # Basic image validation (content type and size)
+            if not cover_image.content_type.startswith("image/"):
+                raise HTTPException(
+                    status_code=400, detail="Invalid cover image file type"
+                )
+            _set_cover_image(db, db_book, cover_image)
+
+        if pdf_file:
+            if pdf_file.content_type != "application/pdf":
+                raise HTTPException(status_code=400, detail="Invalid PDF file type")
+            pdf_content = pdf_file.file.read()
+            _set_pdf(db, db_book, pdf_content)
+
+        _save_blob_refs(db, db_book)
+        db.commit()
+    _release_blobs(db, previous_keys)
     db.refresh(db_book)
     return db_book
 
 
 
 @router.delete("/delete/{book_id}", response_model=BookSchema)
-async def delete_book(
+def delete_book(
     book_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)
 ):
     db_book = db.query(Book).filter(Book.id == book_id).first()
@@ -123,8 +206,12 @@ async def delete_book(
             status_code=403, detail="Not authorized to delete this book"
         )
 
+    released_keys = _blob_keys(db_book)
+    # explicit rather than relying on ON DELETE CASCADE, which SQLite only honours when enabled
+    db.execute(delete(book_blobs).where(book_blobs.c.book_id == db_book.id))
     db.delete(db_book)
     db.commit()
+    _release_blobs(db, released_keys)
     return db_book
 
 
@@ -158,22 +245,36 @@ def view_book(book_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/{book_id}/cover_image")
-def get_cover_image(book_id: UUID, db: Session = Depends(get_db)):
+def get_cover_image(
+    book_id: UUID,
+    request: Request,
+    size: Optional[int] = Query(None, gt=0, description="Display width in px; the smallest rendition covering it is served"),
+    db: Session = Depends(get_db),
+):
     book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    if not book.cover_image:
+    if not book.cover_image_key:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cover image not found for this book")
 
-    return Response(content=book.cover_image, media_type="image/jpeg")
+    size_name, fmt = images.pick_rendition(size, request.headers.get("accept"))
+    # covers uploaded before renditions existed only have the single JPEG
+    rendition = (book.cover_renditions or {}).get(images.rendition_name(size_name, fmt)) or {
+        "key": book.cover_image_key, "size": book.cover_image_size, "mime": book.cover_image_mime or "image/jpeg",
+    }
+    response = blob_response(request, get_blob_store(), rendition["key"], rendition["size"], rendition["mime"],
+                             cache_control="public, max-age=3600")
+    response.headers["Vary"] = "Accept"
+    return response
 
 
 @router.get("/{book_id}/pdf")
-def get_pdf(book_id: UUID, db: Session = Depends(get_db)):
+def get_pdf(book_id: UUID, request: Request, db: Session = Depends(get_db)):
     book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    if not book.pdf:
+    if not book.pdf_key:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PDF not found for this book")
 
-    return Response(content=book.pdf, media_type="application/pdf")
+    # Streamed in chunks with Range/ETag support so PDF.js can fetch pages lazily
+    return blob_response(request, get_blob_store(), book.pdf_key, book.pdf_size, book.pdf_mime or "application/pdf")
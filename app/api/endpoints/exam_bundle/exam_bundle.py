@@ -1,20 +1,87 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Response
 from app.core.dependencies import get_db
 from app.models.subject import Subject
 from app.models.question import Question
 from app.models.user import User
-from app.models.exam_bundle import ExamBundle
+from app.models.exam_bundle import ExamBundle, exam_bundle_questions
+from app.models.associations import exam_bundle_student_classes_association
 from app.models.student_class import StudentClass
 from app.utils.constant.globals import UserRole
 from app.schemas.exam_bundle import *
+from app.schemas.question import QuestionSchema
 from app.api.endpoints.user.functions import get_current_active_user
-from sqlalchemy.orm import Session 
-from typing import List
-from sqlalchemy import func, select
+from app.utils import bundle_cache, stats
+from app.utils.sampling import sample_question_ids_per_subject
+from app.utils import pagination
+from sqlalchemy.orm import Session, selectinload, undefer
+from typing import List, Tuple
+from sqlalchemy import delete, insert, literal, select, union_all
 from uuid import UUID
 
 router = APIRouter(prefix="/exam_bundle", tags=['Exam Bundle'])
 
+
+def _assemble_bundle(db: Session, exam_bundle: ExamBundleCreate) -> Tuple[List[UUID], List[UUID]]:
+    """
+    Validates every subject and class in one query, then samples each subject's
+    questions in one or two more (see sample_question_ids_per_subject).
+    Returns (question_ids, class_ids); raises 400 on unknown ids or too few questions.
+    """
+    subject_ids = list(exam_bundle.subject_combinations)
+    class_ids = list(dict.fromkeys(exam_bundle.class_ids or []))
+
+    found = union_all(
+        select(literal("subject").label("kind"), Subject.id, Subject.name).where(Subject.id.in_(subject_ids)),
+        select(literal("class").label("kind"), StudentClass.id, StudentClass.name).where(StudentClass.id.in_(class_ids)),
+    )
+    subject_names, found_class_ids = {}, set()
+    for kind, row_id, name in db.execute(found):
+        if kind == "subject":
+            subject_names[row_id] = name
+        else:
+            found_class_ids.add(row_id)
+
+    for subject_id in subject_ids:
+        if subject_id not in subject_names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Subject with id {subject_id} not found"
+            )
+    for class_id in class_ids:
+        if class_id not in found_class_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"StudentClass with id {class_id} not found"
+            )
+
+    picked = sample_question_ids_per_subject(db, exam_bundle.subject_combinations)
+    question_ids = []
+    for subject_id, num_questions in exam_bundle.subject_combinations.items():
+        if len(picked[subject_id]) < num_questions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Not enough questions available for subject {subject_names[subject_id]} (requested {num_questions}, found {len(picked[subject_id])})",
+            )
+        question_ids.extend(picked[subject_id])
+    return question_ids, class_ids
+
+
+def _write_bundle_links(db: Session, exam_bundle_id: UUID, question_ids: List[UUID], class_ids: List[UUID]):
+    # executemany INSERTs instead of appending through the relationships one object at a time
+    if question_ids:
+        db.execute(
+            insert(exam_bundle_questions),
+            [{"exam_bundle_id": exam_bundle_id, "question_id": question_id} for question_id in question_ids],
+        )
+    if class_ids:
+        db.execute(
+            insert(exam_bundle_student_classes_association),
+            [{"exam_bundle_id": exam_bundle_id, "student_class_id": class_id} for class_id in class_ids],
+        )
+
+
+def _subject_combinations_json(exam_bundle: ExamBundleCreate) -> dict:
+    # JSON object keys must be strings; ExamBundleSchema parses them back into UUIDs
+    return {str(subject_id): num_questions for subject_id, num_questions in exam_bundle.subject_combinations.items()}
+
 @router.post(
     "/create",
     response_model=ExamBundleSchema,
@@ -30,67 +97,31 @@ def create_exam_bundle(
             status_code=status.HTTP_403_FORBIDDEN, detail="Only admins or teachers can create exam bundles"
         )
 
-    selected_questions = []
-    for subject_id, num_questions in exam_bundle.subject_combinations.items():
-        db_subject = db.query(Subject).filter(Subject.id == subject_id).first()
-        if not db_subject:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Subject with id {subject_id} not found"
-            )
-
-        # Fetch questions for each subject
-        questions_query = (
-            select(Question.id)
-            .filter(Question.subject_id == subject_id)
-            .order_by(func.random())
-            .limit(num_questions)
-        )
-        # Execute the query to get question IDs
-        question_ids = db.execute(questions_query).scalars().all()
-
-        if len(question_ids) < num_questions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough questions available for subject {db_subject.name} (requested {num_questions}, found {len(question_ids)})",
-            )
-
-        # Fetch actual Question objects
-        questions = db.query(Question).filter(Question.id.in_(question_ids)).all()
-        selected_questions.extend(questions)
+    question_ids, class_ids = _assemble_bundle(db, exam_bundle)
 
     db_exam_bundle = ExamBundle(
         name=exam_bundle.name,
         time_in_mins=exam_bundle.time_in_mins,
         is_active=exam_bundle.is_active,
-        subject_combinations=exam_bundle.subject_combinations, # This now holds Dict[UUID, int]
+        subject_combinations=_subject_combinations_json(exam_bundle),
         uploaded_by_id=current_user.id,
     )
     db.add(db_exam_bundle)
-
-    # Associate the selected questions with the exam bundle
-    for question in selected_questions:
-        db_exam_bundle.questions.append(question)
-
-    # Associate student classes
-    if exam_bundle.class_ids:
-        for class_id in exam_bundle.class_ids:
-            student_class = db.query(StudentClass).filter(StudentClass.id == class_id).first()
-            if not student_class:
-                db.rollback()
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail=f"StudentClass with id {class_id} not found"
-                )
-            db_exam_bundle.student_classes.append(student_class)
+    db.flush()  # assigns the id the link rows point at
+    _write_bundle_links(db, db_exam_bundle.id, question_ids, class_ids)
 
     db.commit()
+    stats.invalidate_counts()
+    if exam_bundle.is_active:
+        bundle_cache.get_paper(db, db_exam_bundle.id)  # serialize the paper now, not on the first student's start
     db.refresh(db_exam_bundle)
     return db_exam_bundle
 
 
-@router.get("/all", response_model=List[ExamBundleSchema])
-def read_exam_bundles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exam_bundles = db.query(ExamBundle).offset(skip).limit(limit).all()
-    return exam_bundles
+@router.get("/all", response_model=List[ExamBundleSummarySchema])
+def read_exam_bundles(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    stmt = select(ExamBundle).options(undefer(ExamBundle.question_count), selectinload(ExamBundle.student_classes))
+    return pagination.paginate(db, stmt, ExamBundle, page, response)
 
 
 @router.get("/{exam_bundle_id}", response_model=ExamBundleSchema)
@@ -103,6 +134,33 @@ def read_exam_bundle(exam_bundle_id: UUID, db: Session = Depends(get_db)):
     return db_exam_bundle
 
 
+@router.get("/{exam_bundle_id}/questions", response_model=List[QuestionSchema])
+def read_exam_bundle_questions(
+    exam_bundle_id: UUID,
+    response: Response,
+    page: pagination.PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Questions of a bundle, answers included, one page at a time. Pass the
+    X-Next-Cursor header of a response as `cursor` to get the next page.
+    """
+    if current_user.role not in [UserRole.ADMIN, UserRole.TEACHER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Only admins or teachers can view exam bundle questions"
+        )
+    if not db.execute(select(ExamBundle.id).where(ExamBundle.id == exam_bundle_id)).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exam Bundle not found")
+
+    stmt = (
+        select(Question)
+        .join(exam_bundle_questions, exam_bundle_questions.c.question_id == Question.id)
+        .where(exam_bundle_questions.c.exam_bundle_id == exam_bundle_id)
+    )
+    return pagination.paginate(db, stmt, Question, page, response)
+
+
 @router.put("/update/{exam_bundle_id}", response_model=ExamBundleSchema)
 def update_exam_bundle(
     exam_bundle_id: UUID,
@@ -119,59 +177,27 @@ def update_exam_bundle(
             status_code=status.HTTP_403_FORBIDDEN, detail="Only admins or teachers can update exam bundles"
         )
 
+    # Validate and sample before touching the bundle so a 400 leaves it unchanged
+    question_ids, class_ids = _assemble_bundle(db, exam_bundle)
+
     # Update basic fields
     db_exam_bundle.name = exam_bundle.name
     db_exam_bundle.time_in_mins = exam_bundle.time_in_mins
     db_exam_bundle.is_active = exam_bundle.is_active
-    db_exam_bundle.subject_combinations = exam_bundle.subject_combinations
+    db_exam_bundle.subject_combinations = _subject_combinations_json(exam_bundle)
 
-    # Clear existing associations for questions and student classes
-    db_exam_bundle.questions = []
-    db_exam_bundle.student_classes = []
-    # It might be better to commit here if there's a chance of failure below,
-    # but often it's fine to commit once at the end. For now, one commit at the end.
-
-    selected_questions = []
-    for subject_id, num_questions in exam_bundle.subject_combinations.items():
-        db_subject = db.query(Subject).filter(Subject.id == subject_id).first()
-        if not db_subject:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Subject with id {subject_id} not found"
-            )
-
-        questions_query = (
-            select(Question.id)
-            .filter(Question.subject_id == subject_id)
-            .order_by(func.random())
-            .limit(num_questions)
-        )
-        question_ids = db.execute(questions_query).scalars().all()
-
-        if len(question_ids) < num_questions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough questions available for subject {db_subject.name} (requested {num_questions}, found {len(question_ids)})",
-            )
-
-        questions = db.query(Question).filter(Question.id.in_(question_ids)).all()
-        selected_questions.extend(questions)
-
-    # Associate the new selected questions with the exam bundle
-    for question in selected_questions:
-        db_exam_bundle.questions.append(question)
-
-    # Fetch and add new student classes
-    if exam_bundle.class_ids:
-        for class_id in exam_bundle.class_ids:
-            student_class = db.query(StudentClass).filter(StudentClass.id == class_id).first()
-            if not student_class:
-                # db.rollback() # Rollback if a class is not found, if previous parts were committed.
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail=f"StudentClass with id {class_id} not found during update"
-                )
-            db_exam_bundle.student_classes.append(student_class)
+    # Replace question and student class associations wholesale
+    db.execute(delete(exam_bundle_questions).where(exam_bundle_questions.c.exam_bundle_id == exam_bundle_id))
+    db.execute(
+        delete(exam_bundle_student_classes_association)
+        .where(exam_bundle_student_classes_association.c.exam_bundle_id == exam_bundle_id)
+    )
+    _write_bundle_links(db, exam_bundle_id, question_ids, class_ids)
 
     db.commit()
+    bundle_cache.invalidate_bundle(exam_bundle_id)
+    if exam_bundle.is_active:
+        bundle_cache.get_paper(db, exam_bundle_id)
     db.refresh(db_exam_bundle)
     return db_exam_bundle
 
@@ -193,4 +219,6 @@ def delete_exam_bundle(
 
     db.delete(db_exam_bundle)
     db.commit()
+    stats.invalidate_counts()
+    bundle_cache.invalidate_bundle(exam_bundle_id)
     return db_exam_bundle
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from typing import Dict
+
+from app.core.base import engine, async_engine
+from app.core.hashing import hashing_metrics
+from app.core.metrics import pool_metrics
+from app.models.user import User
+from app.utils import answer_buffer, deadline_sweeper
+from app.schemas.metrics import AutosaveBufferStatsSchema, DeadlineSweepStatsSchema, HashingStatsSchema, PoolStatsSchema
+from app.api.endpoints.user.functions import get_current_admin_user
+
+router = APIRouter(prefix="/metrics", tags=['Metrics'])
+
+
+@router.get("/pool", response_model=Dict[str, PoolStatsSchema])
+def get_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """Live connection pool statistics for this worker, keyed by engine."""
+    pools = {"sync": engine.pool, "async": async_engine.pool}
+    return {
+        name: pool_metrics[name].snapshot(pool)
+        for name, pool in pools.items()
+        if hasattr(pool, "checkedout")  # SQLite stand-ins may run without a QueuePool
+    }
+
+
+@router.get("/hashing", response_model=HashingStatsSchema)
+def get_hashing_stats(current_user: User = Depends(get_current_admin_user)):
+    """Password hashing pool for this worker: queue depth, rejections and wait/hash latency."""
+    return hashing_metrics.snapshot()
+
+
+@router.get("/autosave", response_model=AutosaveBufferStatsSchema)
+def get_autosave_stats(current_user: User = Depends(get_current_admin_user)):
+    """Write-behind autosave buffer for this worker: backlog, flush latency and outcomes."""
+    return answer_buffer.buffer.snapshot()
+
+
+@router.get("/deadlines", response_model=DeadlineSweepStatsSchema)
+def get_deadline_sweep_stats(current_user: User = Depends(get_current_admin_user)):
+    """Deadline sweeper for this worker: expired-attempt backlog, sweep duration and attempts graded."""
+    return deadline_sweeper.sweeper.snapshot()
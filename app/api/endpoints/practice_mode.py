@@ -1,24 +1,43 @@
-import random
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any # Dict, Any might not be strictly needed here but good for flexibility
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Dict, Any, Union # Dict, Any might not be strictly needed here but good for flexibility
 from uuid import UUID
 from datetime import datetime, timezone
 from pydantic import BaseModel # For StartPracticeSessionResponse
 
-from app.core.dependencies import get_db
-from app.models.user import User
+from app.core.dependencies import get_async_db
+from app.schemas.user import Principal
 from app.models.question import Question
 from app.models.practice_session import PracticeSession, PracticeSessionStatus
 from app.models.practice_session_answer import PracticeSessionAnswer # Added
-from app.schemas.practice_session import PracticeSessionCreateSchema, PracticeSessionSchema
+from app.schemas.practice_session import PracticeSessionCreateSchema, PracticeSessionSchema, PracticeSessionSummarySchema
 from app.schemas.practice_session_answer import PracticeSessionAnswerCreateSchema # Added
 from app.schemas.question import QuestionSchema
-from app.api.endpoints.user.functions import get_current_active_user
+from app.api.endpoints.user.functions import get_current_active_principal
 from app.utils.constant.globals import UserRole, QuestionType
+from app.utils.grading import load_answer_key, grade_submission, bulk_insert_answers
+from app.utils.sampling import sample_question_ids
 
 router = APIRouter(prefix="/student/practice", tags=["Student Practice Mode"])
 
+PRACTICE_SESSION_SIZE = 60
+
+
+# AsyncSession cannot lazy load: answers come in one SELECT ... IN with their answer key inlined as a column
+ANSWERS_WITH_KEY = selectinload(PracticeSession.answers).undefer(PracticeSessionAnswer.correct_answer)
+
+
+async def _get_session_with_answers(db: AsyncSession, session_id: UUID, student_id: UUID):
+    result = await db.execute(
+        select(PracticeSession)
+        .where(PracticeSession.id == session_id, PracticeSession.student_id == student_id)
+        .options(ANSWERS_WITH_KEY)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 # Define a response model for starting a session, including questions
 class StartPracticeSessionResponse(BaseModel):
     session: PracticeSessionSchema
@@ -26,10 +45,10 @@ class StartPracticeSessionResponse(BaseModel):
 
 
 @router.post("/sessions/start", response_model=StartPracticeSessionResponse)
-def start_practice_session(
+async def start_practice_session(
     practice_options: PracticeSessionCreateSchema,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
@@ -37,26 +56,27 @@ def start_practice_session(
             detail="Only students can start a practice session."
         )
 
-    query = db.query(Question)
+    filters = []
     if practice_options.subject_id:
-        query = query.filter(Question.subject_id == practice_options.subject_id)
+        filters.append(Question.subject_id == practice_options.subject_id)
     if practice_options.question_type:
-        query = query.filter(Question.type == practice_options.question_type)
+        filters.append(Question.type == practice_options.question_type)
     if practice_options.year:
-        query = query.filter(Question.year == practice_options.year)
+        filters.append(Question.year == practice_options.year)
 
-    available_questions = query.all()
+    # Sampled in SQL; only the chosen rows are loaded
+    selected_question_ids = await db.run_sync(sample_question_ids, filters, PRACTICE_SESSION_SIZE)
 
-    if not available_questions:
+    if not selected_question_ids:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No questions found matching your criteria. Try broadening your filters."
         )
 
-    num_questions_to_select = min(len(available_questions), 60)
-    selected_questions = random.sample(available_questions, num_questions_to_select)
-
-    selected_question_ids = [q.id for q in selected_questions]
+    questions_by_id = {
+        q.id: q for q in (await db.execute(select(Question).where(Question.id.in_(selected_question_ids)))).scalars()
+    }
+    selected_questions = [questions_by_id[qid] for qid in selected_question_ids]
 
     new_session = PracticeSession(
         student_id=current_user.id,
@@ -65,11 +85,11 @@ def start_practice_session(
         filter_subject_id=practice_options.subject_id,
         filter_question_type=practice_options.question_type,
         filter_year=practice_options.year,
-        question_ids=selected_question_ids
+        question_ids=[str(qid) for qid in selected_question_ids],  # JSON column
+        answers=[],
     )
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()
 
     response_questions = [QuestionSchema.model_validate(q) for q in selected_questions]
     response_session = PracticeSessionSchema.model_validate(new_session)
@@ -78,11 +98,11 @@ def start_practice_session(
 
 
 @router.post("/sessions/{session_id}/submit", response_model=PracticeSessionSchema)
-def submit_practice_session_answers(
+async def submit_practice_session_answers(
     session_id: UUID,
     answers_submission: List[PracticeSessionAnswerCreateSchema],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
@@ -90,10 +110,12 @@ def submit_practice_session_answers(
             detail="Only students can submit practice session answers."
         )
 
-    db_session_attempt = db.query(PracticeSession).filter(
-        PracticeSession.id == session_id,
-        PracticeSession.student_id == current_user.id
-    ).first()
+    db_session_attempt = (await db.execute(
+        select(PracticeSession).where(
+            PracticeSession.id == session_id,
+            PracticeSession.student_id == current_user.id
+        )
+    )).scalars().first()
 
     if not db_session_attempt:
         raise HTTPException(
@@ -107,77 +129,73 @@ def submit_practice_session_answers(
             detail=f"This practice session is already {db_session_attempt.status.value}."
         )
 
-    total_score_achieved = 0.0
-
-    practice_session_question_ids_str = {str(qid) for qid in db_session_attempt.question_ids}
+    session_question_ids = {UUID(str(qid)) for qid in db_session_attempt.question_ids}
     processed_question_ids_payload = set()
 
     for answer_data in answers_submission:
-        str_answer_question_id = str(answer_data.question_id)
-        if str_answer_question_id not in practice_session_question_ids_str:
+        if answer_data.question_id not in session_question_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Question ID {answer_data.question_id} was not part of this practice session."
             )
-        if str_answer_question_id in processed_question_ids_payload:
+        if answer_data.question_id in processed_question_ids_payload:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Duplicate answer submitted for question ID {answer_data.question_id}."
             )
-        processed_question_ids_payload.add(str_answer_question_id)
-
-        db_question = db.query(Question).filter(Question.id == answer_data.question_id).first()
-        if not db_question:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Question with id {answer_data.question_id} not found.")
-
-        is_correct = False
-        marks_awarded = 0.0
+        processed_question_ids_payload.add(answer_data.question_id)
 
-        if str(answer_data.selected_answer) == str(db_question.answer):
-            is_correct = True
-            marks_awarded = 1.0
+    answer_key = await db.run_sync(load_answer_key, processed_question_ids_payload)
+    missing_question_ids = processed_question_ids_payload - answer_key.keys()
+    if missing_question_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Question with id {next(iter(missing_question_ids))} not found.")
 
-        total_score_achieved += marks_awarded
+    grading = grade_submission(answer_key, answers_submission)
+    await db.run_sync(bulk_insert_answers, PracticeSessionAnswer, "practice_session_id", db_session_attempt.id, grading.rows)
 
-        practice_answer = PracticeSessionAnswer(
-            practice_session_id=db_session_attempt.id,
-            question_id=answer_data.question_id,
-            selected_answer=str(answer_data.selected_answer),
-            is_correct=is_correct,
-            marks_awarded=marks_awarded
-        )
-        db.add(practice_answer)
-
-    db_session_attempt.score = total_score_achieved
+    db_session_attempt.score = grading.score
     db_session_attempt.status = PracticeSessionStatus.COMPLETED
     db_session_attempt.submission_time = datetime.now(timezone.utc)
 
-    db.commit()
-    db.refresh(db_session_attempt)
+    await db.commit()
 
-    return db_session_attempt
+    return await _get_session_with_answers(db, session_id, current_user.id)
 
 
-@router.get("/sessions", response_model=List[PracticeSessionSchema])
-def list_student_practice_sessions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+@router.get("/sessions", response_model=List[Union[PracticeSessionSummarySchema, PracticeSessionSchema]])
+async def list_student_practice_sessions(
+    include_answers: bool = Query(False, description="Include every answer with its correct answer"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
+    """
+    The student's practice sessions, newest first. Summaries by default (one query);
+    `include_answers=true` adds the per-answer review (one more query).
+    """
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can view their practice sessions."
         )
 
-    sessions = db.query(PracticeSession).filter(PracticeSession.student_id == current_user.id).order_by(PracticeSession.start_time.desc()).all()
-    return sessions
+    stmt = (
+        select(PracticeSession)
+        .where(PracticeSession.student_id == current_user.id)
+        .order_by(PracticeSession.start_time.desc())
+    )
+    schema = PracticeSessionSummarySchema
+    if include_answers:
+        stmt = stmt.options(ANSWERS_WITH_KEY)
+        schema = PracticeSessionSchema
+    # Validated here, not by response_model: the summary schema never touches the unloaded answers
+    return [schema.model_validate(session) for session in (await db.execute(stmt)).scalars()]
 
 
 @router.get("/sessions/{session_id}/result", response_model=PracticeSessionSchema)
-def get_student_practice_session_result(
+async def get_student_practice_session_result(
     session_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
@@ -185,10 +203,7 @@ def get_student_practice_session_result(
             detail="Only students can view their practice session results."
         )
 
-    db_practice_session = db.query(PracticeSession).filter(
-        PracticeSession.id == session_id,
-        PracticeSession.student_id == current_user.id
-    ).first()
+    db_practice_session = await _get_session_with_answers(db, session_id, current_user.id)
 
     if not db_practice_session:
         raise HTTPException(
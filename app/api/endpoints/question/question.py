@@ -6,6 +6,8 @@ from app.models.user import User
 from app.utils.constant.globals import UserRole
 from app.schemas.question import *
 from app.api.endpoints.user.functions import get_current_active_user
+from app.utils import bundle_cache, pagination, stats
+from sqlalchemy import select
 from sqlalchemy.orm import Session 
 from typing import List
 from uuid import UUID
@@ -37,14 +39,14 @@ def create_question(
     )
     db.add(db_question)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(db_question)
     return db_question
 
 
 @router.get("/all", response_model=List[QuestionSchema])
-def read_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    questions = db.query(Question).offset(skip).limit(limit).all()
-    return questions
+def read_questions(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    return pagination.paginate(db, select(Question), Question, page, response)
 
 
 @router.get("/{question_id}", response_model=QuestionSchema)
@@ -80,7 +82,9 @@ def update_question(
     db_question.options = question.options
     db_question.answer = question.answer
     db_question.year = question.year
+    affected_bundle_ids = bundle_cache.bundle_ids_for_question(db, question_id)
     db.commit()
+    bundle_cache.invalidate_bundles(affected_bundle_ids)
     db.refresh(db_question)
     return db_question
 
@@ -97,18 +101,22 @@ def delete_question(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can delete questions"
         )
+    affected_bundle_ids = bundle_cache.bundle_ids_for_question(db, question_id)
     db.delete(db_question)
     db.commit()
+    stats.invalidate_counts()
+    bundle_cache.invalidate_bundles(affected_bundle_ids)
     return db_question
 
 
 @router.get("/{question_id}/image")
 def get_question_image(question_id: UUID, db: Session = Depends(get_db)):
-    db_question = db.query(Question).filter(Question.id == question_id).first()
-    if not db_question:
+    # The only place question_image is read: select just that column
+    row = db.query(Question.question_image).filter(Question.id == question_id).first()
+    if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
 
-    if not db_question.question_image:
+    if not row.question_image:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found for this question")
 
-    return Response(content=db_question.question_image, media_type="image/jpeg")
\ No newline at end of file
+    return Response(content=row.question_image, media_type="image/jpeg")
\ No newline at end of file
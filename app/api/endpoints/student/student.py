@@ -1,11 +1,13 @@
-from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException, Response
 from app.core.dependencies import get_db
 from app.models.student import Student
 from app.models.user import User
 from app.schemas.student import StudentSchema, StudentCreate
-from app.api.endpoints.user.functions import get_current_active_user, get_password_hash
+from app.api.endpoints.user.functions import get_current_active_user, get_password_hash, revoke_user_status
 from app.utils.constant.globals import UserRole # Added UserRole
+from sqlalchemy import select
 from sqlalchemy.orm import Session 
+from app.utils import pagination, stats
 import uuid # Ensure uuid is imported if student_id type hint uses it directly
 from typing import List
 
@@ -45,14 +47,14 @@ def create_student(student: StudentCreate, db: Session = Depends(get_db), curren
     )
     db.add(db_student)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(db_student)
     return db_student
 
 
 @router.get("/all", response_model=List[StudentSchema])
-def read_students(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    students = db.query(Student).offset(skip).limit(limit).all()
-    return students
+def read_students(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    return pagination.paginate(db, select(Student), Student, page, response)
 
 @router.get("/{student_id}", response_model=StudentSchema)
 def read_student(student_id: uuid.UUID, db: Session = Depends(get_db)):
@@ -108,4 +110,6 @@ def delete_student(
     # Consider what happens to related data (exam attempts etc) - cascade deletes should handle if set up.
     db.delete(db_student)
     db.commit()
+    stats.invalidate_counts()
+    revoke_user_status(db_student.id)
     return db_student
\ No newline at end of file
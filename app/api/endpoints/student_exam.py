@@ -1,32 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, undefer
+import asyncio
+from typing import List, Union
 from uuid import UUID
 from datetime import datetime, timezone
 from pydantic import BaseModel # Added for StartExamAttemptResponse
 
-from app.core.dependencies import get_db
-from app.models.user import User
+from app.core.dependencies import get_async_db
+from app.core.settings import settings
+from app.schemas.user import Principal
+from app.models.associations import exam_bundle_student_classes_association
 from app.models.exam_bundle import ExamBundle
 from app.models.student_class import StudentClass
 from app.models.student import Student
-from app.models.question import Question
 from app.models.student_exam_attempt import StudentExamAttempt, ExamAttemptStatus
 from app.models.student_answer import StudentAnswer # Added
-from app.schemas.exam_bundle import ExamBundleSchema
-from app.schemas.question import QuestionSchema
-from app.schemas.student_exam_attempt import StudentExamAttemptSchema
+from app.schemas.exam_bundle import ExamBundleSummarySchema
+from app.schemas.question import ExamPaperQuestionSchema
+from app.schemas.student_exam_attempt import StudentExamAttemptSchema, StudentExamAttemptSummarySchema
 from app.schemas.student_answer import StudentAnswerCreate # Added
-from app.api.endpoints.user.functions import get_current_active_user
+from app.api.endpoints.user.functions import get_current_active_principal
 from app.utils.constant.globals import UserRole
+from app.utils.grading import grade_submission, upsert_answers
+from app.utils import answer_buffer, bundle_cache
+from app.utils.deadline_sweeper import past_deadline
 
 router = APIRouter(prefix="/student", tags=["Student Exams"])
 
-@router.get("/available_exams", response_model=List[ExamBundleSchema])
-def list_available_exams_for_student(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+
+def _violated_constraint(error: IntegrityError):
+    """Name of the constraint an IntegrityError violated, or None if the driver doesn't say.
+
+    psycopg2 exposes it on `orig.diag`; SQLAlchemy's asyncpg adapter raises its own error
+    `from` the asyncpg one, which carries `constraint_name`.
+    """
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
+async def _get_student_class_id(db: AsyncSession, student_id: UUID):
+    return (await db.execute(select(Student.student_class_id).where(Student.id == student_id))).scalar_one_or_none()
+
+
+async def _has_attempt_in_progress(db: AsyncSession, student_id: UUID, exam_bundle_id: UUID) -> bool:
+    return (await db.execute(select(exists().where(
+        StudentExamAttempt.student_id == student_id,
+        StudentExamAttempt.exam_bundle_id == exam_bundle_id,
+        StudentExamAttempt.status == ExamAttemptStatus.IN_PROGRESS,
+    )))).scalar()
+
+
+# AsyncSession cannot lazy load: answers come in one SELECT ... IN with their answer key
+# inlined as a column, so any number of answers (or attempts) costs exactly two queries.
+ANSWERS_WITH_KEY = selectinload(StudentExamAttempt.answers).undefer(StudentAnswer.correct_answer)
+
+
+async def _get_attempt_with_answers(db: AsyncSession, attempt_id: UUID, student_id: UUID):
+    result = await db.execute(
+        select(StudentExamAttempt)
+        .where(StudentExamAttempt.id == attempt_id, StudentExamAttempt.student_id == student_id)
+        .options(ANSWERS_WITH_KEY)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def _get_in_progress_attempt(db: AsyncSession, attempt_id: UUID, student_id: UUID, action: str, for_update: bool = True):
+    """
+    The student's attempt, 404/400 unless in progress. Row-locked until commit by default so
+    autosaves and the final submit of one attempt run one at a time (no answer lands after grading).
+    """
+    stmt = select(StudentExamAttempt).where(
+        StudentExamAttempt.id == attempt_id, StudentExamAttempt.student_id == student_id
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    db_attempt = (await db.execute(stmt)).scalars().first()
+
+    if not db_attempt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Exam attempt not found or does not belong to the current user."
+        )
+
+    if db_attempt.status != ExamAttemptStatus.IN_PROGRESS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"This exam attempt is already {db_attempt.status.value} and cannot be {action}."
+        )
+
+    if past_deadline(db_attempt.deadline):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The time for this exam attempt is up; it will be graded with the answers saved so far."
+        )
+    return db_attempt
+
+
+def _check_answers_in_bundle(answer_key, answers: List[StudentAnswerCreate]) -> None:
+    for answer_data in answers:
+        if answer_data.question_id not in answer_key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Question ID {answer_data.question_id} is not part of this exam bundle."
+            )
+
+
+@router.get("/available_exams", response_model=List[ExamBundleSummarySchema])
+async def list_available_exams_for_student(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     # Ensure the user is a student. Assuming UserRole.USER is the student role as per User model polymorphic_identity.
     # Or if there's a specific UserRole.STUDENT. Let's use UserRole.USER for now based on User model.
@@ -43,32 +132,32 @@ def list_available_exams_for_student(
         )
 
     # We need the Student specific profile to get student_class_id
-    student_profile = db.query(Student).filter(Student.id == current_user.id).first()
-    if not student_profile or not student_profile.student_class_id:
+    student_class_id = await _get_student_class_id(db, current_user.id)
+    if not student_class_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student profile or class assignment not found."
         )
 
-    available_exams = (
-        db.query(ExamBundle)
+    result = await db.execute(
+        select(ExamBundle)
         .join(ExamBundle.student_classes)
-        .filter(StudentClass.id == student_profile.student_class_id, ExamBundle.is_active == True)
-        .all()
+        .where(StudentClass.id == student_class_id, ExamBundle.is_active == True)
+        .options(undefer(ExamBundle.question_count), selectinload(ExamBundle.student_classes))
     )
-    return available_exams
+    return result.scalars().all()
 
 # Define the custom response model for start_exam_attempt
 class StartExamAttemptResponse(BaseModel): # Need to import BaseModel from pydantic
     attempt: StudentExamAttemptSchema
-    questions: List[QuestionSchema]
+    questions: List[ExamPaperQuestionSchema]
 
 
 @router.post("/exam_attempts/{exam_bundle_id}/start", response_model=StartExamAttemptResponse)
-def start_exam_attempt(
+async def start_exam_attempt(
     exam_bundle_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
@@ -76,84 +165,105 @@ def start_exam_attempt(
             detail="Only students can start an exam attempt."
         )
 
-    db_exam_bundle = db.query(ExamBundle).filter(ExamBundle.id == exam_bundle_id, ExamBundle.is_active == True).first()
+    db_exam_bundle = (await db.execute(
+        select(ExamBundle.id, ExamBundle.time_in_mins).where(ExamBundle.id == exam_bundle_id, ExamBundle.is_active == True)
+    )).first()
     if not db_exam_bundle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Active exam bundle not found."
         )
 
-    student_profile = db.query(Student).filter(Student.id == current_user.id).first()
-    if not student_profile or not student_profile.student_class_id:
+    student_class_id = await _get_student_class_id(db, current_user.id)
+    if not student_class_id:
         # This case might be redundant if list_available_exams already filters, but good for direct access.
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Student class not found or student profile incomplete.")
 
-    is_eligible = False
-    for s_class in db_exam_bundle.student_classes:
-        if s_class.id == student_profile.student_class_id:
-            is_eligible = True
-            break
+    is_eligible = (await db.execute(
+        select(exists().where(
+            exam_bundle_student_classes_association.c.exam_bundle_id == exam_bundle_id,
+            exam_bundle_student_classes_association.c.student_class_id == student_class_id,
+        ))
+    )).scalar()
     if not is_eligible:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not eligible for this exam.")
 
-    existing_active_attempt = (
-        db.query(StudentExamAttempt)
-        .filter(
-            StudentExamAttempt.student_id == current_user.id,
-            StudentExamAttempt.exam_bundle_id == exam_bundle_id,
-            StudentExamAttempt.status == ExamAttemptStatus.IN_PROGRESS,
-        )
-        .first()
-    )
-    if existing_active_attempt:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have an active attempt for this exam.",
-        )
-
+    start_time = datetime.now(timezone.utc)
     new_attempt = StudentExamAttempt(
         student_id=current_user.id,
         exam_bundle_id=exam_bundle_id,
-        start_time=datetime.now(timezone.utc),
-        status=ExamAttemptStatus.IN_PROGRESS
+        start_time=start_time,
+        deadline=start_time + db_exam_bundle.time_in_mins if db_exam_bundle.time_in_mins else None,
+        status=ExamAttemptStatus.IN_PROGRESS,
+        answers=[],
     )
     db.add(new_attempt)
-    db.commit()
-    db.refresh(new_attempt)
-
-    # QuestionSchema already excludes 'answer' field, so direct validation is fine.
-    questions_for_exam = [QuestionSchema.model_validate(q) for q in db_exam_bundle.questions]
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        # uq_student_exam_attempts_in_progress: one in-progress attempt per student and bundle,
+        # checked by the database so two concurrent starts can't both succeed. Any other
+        # violation is a real error, not a duplicate start.
+        await db.rollback()
+        constraint = _violated_constraint(e)
+        if constraint is None:
+            # The driver doesn't name it (e.g. SQLite): a duplicate start is the one that finds
+            # the other in-progress attempt committed
+            constraint = "uq_student_exam_attempts_in_progress" if await _has_attempt_in_progress(
+                db, current_user.id, exam_bundle_id
+            ) else None
+        if constraint != "uq_student_exam_attempts_in_progress":
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You already have an active attempt for this exam.",
+        )
 
-    attempt_schema = StudentExamAttemptSchema.model_validate(new_attempt)
+    # The paper is shared by every student sitting this bundle: cached JSON bytes, spliced in as-is.
+    # Only the per-student attempt goes through Pydantic; response_model above documents the shape.
+    paper = await db.run_sync(bundle_cache.get_paper, exam_bundle_id)
+    attempt_json = StudentExamAttemptSchema.model_validate(new_attempt).model_dump_json().encode()
 
-    return StartExamAttemptResponse(attempt=attempt_schema, questions=questions_for_exam)
+    return Response(
+        content=b'{"attempt":' + attempt_json + b',"questions":' + paper + b"}",
+        media_type="application/json",
+    )
 
 
-@router.get("/exam_attempts", response_model=List[StudentExamAttemptSchema])
-def list_student_exam_attempts(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+@router.get("/exam_attempts", response_model=List[Union[StudentExamAttemptSummarySchema, StudentExamAttemptSchema]])
+async def list_student_exam_attempts(
+    include_answers: bool = Query(False, description="Include every answer with its correct answer"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
+    """
+    The student's attempts, newest first. Summaries by default (one query);
+    `include_answers=true` adds the per-answer review (one more query).
+    """
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can view their exam attempts."
         )
 
-    attempts = db.query(StudentExamAttempt).filter(StudentExamAttempt.student_id == current_user.id).order_by(StudentExamAttempt.start_time.desc()).all()
-    # For each attempt, Pydantic will serialize it.
-    # StudentExamAttemptSchema has answers: List[StudentAnswerSchema].
-    # StudentAnswerSchema now has correct_answer field.
-    # The StudentAnswer model has @property correct_answer.
-    # So, this should work directly.
-    return attempts
+    stmt = (
+        select(StudentExamAttempt)
+        .where(StudentExamAttempt.student_id == current_user.id)
+        .order_by(StudentExamAttempt.start_time.desc())
+    )
+    schema = StudentExamAttemptSummarySchema
+    if include_answers:
+        stmt = stmt.options(ANSWERS_WITH_KEY)
+        schema = StudentExamAttemptSchema
+    # Validated here, not by response_model: the summary schema never touches the unloaded answers
+    return [schema.model_validate(attempt) for attempt in (await db.execute(stmt)).scalars()]
 
 
 @router.get("/exam_attempts/{attempt_id}/result", response_model=StudentExamAttemptSchema)
-def get_student_exam_attempt_result(
+async def get_student_exam_attempt_result(
     attempt_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
@@ -161,19 +271,7 @@ def get_student_exam_attempt_result(
             detail="Only students can view their exam results."
         )
 
-    db_attempt = db.query(StudentExamAttempt).filter(
-        StudentExamAttempt.id == attempt_id,
-        StudentExamAttempt.student_id == current_user.id
-    ).options(
-        # Eager load answers and their related questions to ensure `correct_answer` property can be accessed
-        # without further queries if the session were to close before Pydantic serialization.
-        # This depends on how Pydantic interacts with lazy-loaded properties.
-        # For safety, especially if properties access related models that might be lazy-loaded:
-        # from sqlalchemy.orm import joinedload
-        # .options(joinedload(StudentExamAttempt.answers).joinedload(StudentAnswer.question))
-        # However, Pydantic's from_attributes usually handles this by accessing properties during serialization.
-        # Let's assume it works first, and optimize with joinedload if performance/lazyloading becomes an issue.
-    ).first()
+    db_attempt = await _get_attempt_with_answers(db, attempt_id, current_user.id)
 
     if not db_attempt:
         raise HTTPException(
@@ -190,89 +288,112 @@ def get_student_exam_attempt_result(
     return db_attempt
 
 
-@router.post("/exam_attempts/{attempt_id}/submit", response_model=StudentExamAttemptSchema)
-def submit_exam_answers(
+@router.put("/exam_attempts/{attempt_id}/answers", status_code=status.HTTP_204_NO_CONTENT)
+async def autosave_exam_answers(
     attempt_id: UUID,
-    answers_submission: List[StudentAnswerCreate],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    answers: List[StudentAnswerCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
 ):
+    """
+    Stores the current answer to one or a few questions of an in-progress attempt. Saving is
+    idempotent (a retry or a replayed batch changes nothing) and the latest answer per question
+    wins, including within one batch. Answers are graded on submit.
+    """
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can submit answers."
+            detail="Only students can save answers."
         )
 
-    # Fetch the student's exam attempt
-    db_attempt = db.query(StudentExamAttempt).filter(
-        StudentExamAttempt.id == attempt_id,
-        StudentExamAttempt.student_id == current_user.id
-    ).first()
-
-    if not db_attempt:
+    if not answers:
+        return
+    if len(answers) > settings.AUTOSAVE_MAX_BATCH:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Exam attempt not found or does not belong to the current user."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.AUTOSAVE_MAX_BATCH} answers can be saved at once."
         )
 
-    if db_attempt.status != ExamAttemptStatus.IN_PROGRESS:
+    # Write-behind: nothing is written here, so no lock; the flusher drops answers whose attempt
+    # was submitted meanwhile
+    write_behind = settings.AUTOSAVE_WRITE_BEHIND
+    db_attempt = await _get_in_progress_attempt(db, attempt_id, current_user.id, "saved to", for_update=not write_behind)
+    answer_key = await db.run_sync(bundle_cache.get_answer_key, db_attempt.exam_bundle_id)
+    _check_answers_in_bundle(answer_key, answers)
+
+    if write_behind:
+        latest = {answer.question_id: str(answer.selected_answer) for answer in answers}
+        await run_in_threadpool(answer_buffer.buffer.put, db_attempt.id, latest)
+        return
+
+    rows = [
+        {"question_id": answer.question_id, "selected_answer": str(answer.selected_answer)}
+        for answer in answers
+    ]
+    await db.run_sync(upsert_answers, StudentAnswer, "student_exam_attempt_id", db_attempt.id, rows)
+    await db.commit()
+
+
+@router.post("/exam_attempts/{attempt_id}/submit", response_model=StudentExamAttemptSchema)
+async def submit_exam_answers(
+    attempt_id: UUID,
+    answers_submission: List[StudentAnswerCreate] = Body(default=[]),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """
+    Ends the attempt and grades every stored answer. Answers sent here are saved first (they
+    win over autosaved ones); with autosave in use the body can be empty.
+    """
+    if current_user.role != UserRole.STUDENT:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"This exam attempt is already {db_attempt.status.value} and cannot be submitted to."
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can submit answers."
         )
 
-    total_score_achieved = 0.0
+    if settings.AUTOSAVE_WRITE_BEHIND:
+        # Answers acknowledged by another worker reach the database with its next flush; wait for
+        # it before locking the attempt (which that flush needs) rather than grading without them
+        await asyncio.sleep(settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS)
 
-    # Fetch all question IDs part of the original exam bundle to validate submitted question_ids
-    # Ensure exam_bundle relationship is loaded if it's lazy by default.
-    # Accessing db_attempt.exam_bundle might trigger a lazy load if session is still active.
-    if not db_attempt.exam_bundle: # Should not happen if FK is set and data is consistent
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Exam bundle details missing for the attempt.")
+    db_attempt = await _get_in_progress_attempt(db, attempt_id, current_user.id, "submitted to")
 
-    exam_bundle_question_ids = {str(q.id) for q in db_attempt.exam_bundle.questions}
-    processed_question_ids = set()
+    # The bundle's answer key doubles as the membership check below; it is served
+    # from the per-bundle cache so the deadline spike never reads the questions table.
+    answer_key = await db.run_sync(bundle_cache.get_answer_key, db_attempt.exam_bundle_id)
+    _check_answers_in_bundle(answer_key, answers_submission)
 
+    processed_question_ids = set()
     for answer_data in answers_submission:
-        str_question_id = str(answer_data.question_id)
-        if str_question_id not in exam_bundle_question_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Question ID {answer_data.question_id} is not part of this exam bundle."
-            )
-        if str_question_id in processed_question_ids:
+        if answer_data.question_id in processed_question_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Duplicate answer submitted for question ID {answer_data.question_id}."
             )
-        processed_question_ids.add(str_question_id)
-
-        db_question = db.query(Question).filter(Question.id == answer_data.question_id).first()
-        if not db_question:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Question with id {answer_data.question_id} not found.")
-
-        is_correct = False
-        marks_awarded = 0.0
-
-        if str(answer_data.selected_answer) == str(db_question.answer):
-            is_correct = True
-            marks_awarded = 1.0
-
-        total_score_achieved += marks_awarded
-
-        student_answer = StudentAnswer(
-            student_exam_attempt_id=db_attempt.id,
-            question_id=answer_data.question_id,
-            selected_answer=str(answer_data.selected_answer),
-            is_correct=is_correct,
-            marks_awarded=marks_awarded
+        processed_question_ids.add(answer_data.question_id)
+
+    # Stored answers, then ones still in this worker's write-behind buffer, then anything sent
+    # with the submit; the buffered ones go back to the buffer if grading fails
+    with answer_buffer.buffer.claim(db_attempt.id) as buffered:
+        stored = {
+            row.question_id: row for row in (await db.execute(
+                select(StudentAnswer.question_id, StudentAnswer.selected_answer)
+                .where(StudentAnswer.student_exam_attempt_id == db_attempt.id)
+            ))
+        }
+        stored.update(
+            (question_id, StudentAnswerCreate(question_id=question_id, selected_answer=answer))
+            for question_id, answer in buffered.items()
         )
-        db.add(student_answer)
+        stored.update((answer.question_id, answer) for answer in answers_submission)
 
-    db_attempt.score = total_score_achieved
-    db_attempt.status = ExamAttemptStatus.GRADED
-    db_attempt.submission_time = datetime.now(timezone.utc)
+        grading = grade_submission(answer_key, stored.values())
+        await db.run_sync(upsert_answers, StudentAnswer, "student_exam_attempt_id", db_attempt.id, grading.rows)
 
-    db.commit()
-    db.refresh(db_attempt)
+        db_attempt.score = grading.score
+        db_attempt.status = ExamAttemptStatus.GRADED
+        db_attempt.submission_time = datetime.now(timezone.utc)
 
-    return db_attempt
+        await db.commit()
+
+    return await _get_attempt_with_answers(db, attempt_id, current_user.id)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException, Response
 from app.core.dependencies import get_db
 from app.models.subject import Subject
 from app.models.user import User
 from app.utils.constant.globals import UserRole
 from app.schemas.subject import *
 from app.api.endpoints.user.functions import get_current_active_user
+from sqlalchemy import select
 from sqlalchemy.orm import Session 
+from app.utils import pagination, stats
 from typing import List
 from uuid import UUID
 
@@ -22,14 +24,14 @@ def create_subject(
     db_subject = Subject(name=subject.name)
     db.add(db_subject)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(db_subject)
     return db_subject
 
 
 @router.get("/all", response_model=List[SubjectSchema])
-def read_subjects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    subjects = db.query(Subject).offset(skip).limit(limit).all()
-    return subjects
+def read_subjects(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    return pagination.paginate(db, select(Subject), Subject, page, response)
 
 
 @router.get("/{subject_id}", response_model=SubjectSchema)
@@ -72,4 +74,5 @@ def delete_subject(
         )
     db.delete(db_subject)
     db.commit()
+    stats.invalidate_counts()
     return db_subject
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, status, Depends, UploadFile, File, HTTPException, Response
 from app.core.dependencies import get_db
 from app.models.teacher import Teacher
 from app.models.user import User
 from app.schemas.teacher import TeacherSchema, TeacherCreate
-from app.api.endpoints.user.functions import get_current_active_user, get_password_hash
+from app.api.endpoints.user.functions import get_current_active_user, get_password_hash, revoke_user_status
 from app.utils.constant.globals import UserRole # Added UserRole
+from sqlalchemy import select
 from sqlalchemy.orm import Session 
+from app.utils import pagination, stats
 from typing import List
 import uuid
 
@@ -37,14 +39,14 @@ def create_teacher(teacher: TeacherCreate, db: Session = Depends(get_db), curren
     )
     db.add(db_teacher)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(db_teacher)
     return db_teacher
 
 
 @router.get("/all", response_model=List[TeacherSchema])
-def read_teachers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    teachers = db.query(Teacher).offset(skip).limit(limit).all()
-    return teachers
+def read_teachers(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    return pagination.paginate(db, select(Teacher), Teacher, page, response)
 
 
 @router.get("/{teacher_id}", response_model=TeacherSchema)
@@ -94,4 +96,6 @@ def delete_teacher(
 
     db.delete(db_teacher)
     db.commit()
+    stats.invalidate_counts()
+    revoke_user_status(db_teacher.id)
     return db_teacher
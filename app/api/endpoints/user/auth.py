@@ -2,14 +2,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Annotated
 from datetime import timedelta
-from uuid import UUID as PyUUID # Import Python's UUID type for type checking
 
 # sqlalchemy
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # import
 from app.schemas.user import User, UserLogin, Token
-from app.core.dependencies import get_db
+from app.core.dependencies import get_db, get_async_db
 from app.core.settings import settings
 from app.api.endpoints.user import functions as user_functions
 
@@ -23,13 +23,13 @@ auth_module = APIRouter()
 @auth_module.post("/login", response_model=Token)
 async def login_for_access_token(
     user: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Token:
     """
     Authenticates a user and returns access and refresh tokens.
     Converts member.id (UUID) to string before encoding in JWT.
     """
-    member = user_functions.authenticate_user(db, user=user)
+    member = await user_functions.authenticate_user(db, user=user)
     if not member:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,21 +37,14 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Ensure member.id is converted to a string for JSON serialization in JWT
-    # This is crucial because UUID objects are not directly JSON serializable.
-    member_id_str = str(member.id) if isinstance(member.id, PyUUID) else member.id
+    # token_claims converts member.id (UUID) to a string, since UUIDs are not JSON serializable
+    claims = user_functions.token_claims(member)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = user_functions.create_access_token(
-        data={"id": member_id_str, "email": member.email, "role": member.role}, 
-        expires_delta=access_token_expires
-    )
+    access_token = user_functions.create_access_token(data=claims, expires_delta=access_token_expires)
 
     refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS) # Assuming REFRESH_TOKEN_EXPIRE_DAYS should be in days
-    refresh_token = await user_functions.create_refresh_token(
-        data={"id": member_id_str, "email": member.email, "role": member.role}, 
-        expires_delta=refresh_token_expires
-    )
+    refresh_token = await user_functions.create_refresh_token(data=claims, expires_delta=refresh_token_expires)
     return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
 
 @auth_module.post("/refresh", response_model=Token)
@@ -1,20 +1,23 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Response, status, Depends
 from typing import Annotated
 from datetime import datetime, timedelta, timezone
 from app.utils.constant.globals import UserRole
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from uuid import UUID
 
 # from auth import models, schemas
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 
 # import 
 from app.models import user as UserModel
-from app.schemas.user import UserCreate, UserUpdate, Token
+from app.schemas.user import UserCreate, UserUpdate, Token, Principal
 from app.core.settings import settings
-from app.core.dependencies import get_db, oauth2_scheme
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.dependencies import get_db, get_async_db, oauth2_scheme
+from app.core import hashing
+from app.utils.cache import TTLCache
+from app.utils import pagination, stats
 
 SECRET_KEY= settings.SECRET_KEY
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -22,8 +25,12 @@ ALGORITHM = settings.ALGORITHM
 SECRET_KEY = settings.SECRET_KEY
 REFRESH_SECRET_KEY = settings.REFRESH_SECRET_KEY
 
+# {user_id: (role, is_left)} backing the stateless principal
+user_status_cache = TTLCache(ttl=settings.USER_STATUS_CACHE_TTL_SECONDS, maxsize=settings.USER_STATUS_CACHE_SIZE)
+
 def get_password_hash(passwd):
- return pwd_context.hash(passwd)
+ # Runs on the bounded hashing pool; see app/core/hashing.py
+ return hashing.hash_password(passwd)
 
 # get user by email 
 def get_user_by_email(db: Session, email: str):
@@ -38,17 +45,18 @@ def get_user_by_id(db: Session, user_id: int):
 
 # crete new user 
 def create_new_user(db: Session, user: UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = get_password_hash(user.password)
     new_user = UserModel.User(email=user.email, password=hashed_password, first_name=user.first_name, last_name=user.last_name)
     db.add(new_user)
     db.commit()
+    stats.invalidate_counts()
     db.refresh(new_user)
     return new_user
 
 
 # get all user 
-def read_all_user(db: Session, skip: int, limit: int):
-    return db.query(UserModel.User).offset(skip).limit(limit).all()
+def read_all_user(db: Session, page: pagination.PageParams, response: Response):
+    return pagination.paginate(db, select(UserModel.User), UserModel.User, page, response)
 
 # update user
 def update_user(db: Session, user_id: int, user: UserUpdate):
@@ -58,6 +66,8 @@ def update_user(db: Session, user_id: int, user: UserUpdate):
         setattr(db_user, key, value)
     db.add(db_user)
     db.commit()
+    stats.invalidate_counts()
+    revoke_user_status(db_user.id)
     db.refresh(db_user)
     return db_user
 
@@ -66,21 +76,33 @@ def delete_user(db: Session, user_id: int):
     db_user = get_user_by_id(db, user_id)
     db.delete(db_user)
     db.commit()
+    stats.invalidate_counts()
+    revoke_user_status(db_user.id)
     # db.refresh(db_user)
     return {"msg": f"{db_user.email} deleted successfully"}
 
 # =====================> login/logout <============================
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
-def authenticate_user(db: Session, user: UserCreate):
-    member = get_user_by_email(db, user.email)
+async def authenticate_user(db: AsyncSession, user: UserCreate):
+    # The bcrypt/argon2 check is awaited on the hashing pool, never run on the event loop
+    member = await db.run_sync(get_user_by_email, user.email)
     if not member:
         return False
-    if not verify_password(user.password, member.password):
+    matches, new_hash = await hashing.verify_and_update_async(user.password, member.password)
+    if not matches:
         return False
+    if new_hash:
+        # Hashed with an outdated scheme or cost: store the upgraded hash while we have the plaintext
+        member.password = new_hash
+        await db.commit()
     return member
 
+def token_claims(member) -> dict:
+    """Claims of the tokens login issues; get_current_principal trusts `id` and `email`."""
+    return {"id": str(member.id), "email": member.email, "role": member.role}
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -112,10 +134,7 @@ async def refresh_access_token(db: Session, refresh_token: str):
         if member is None:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token =  create_access_token(
-            data={"id": member.id, "email": member.email, "role": member.role},
-            expires_delta=access_token_expires
-        )
+        access_token =  create_access_token(data=token_claims(member), expires_delta=access_token_expires)
         return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
@@ -153,4 +172,56 @@ def get_current_admin_user(current_user: UserModel.User = Depends(get_current_ac
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Only admins are allowed"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+# =====================> stateless principal <============================
+def get_user_status(db: Session, user_id: UUID):
+    """Returns (role, is_left) for a user, hitting the DB at most once per TTL window."""
+    status_ = user_status_cache.get(user_id)
+    if status_ is None:
+        row = db.execute(
+            select(UserModel.User.role, UserModel.User.is_left).where(UserModel.User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        status_ = (row.role, row.is_left)
+        user_status_cache.set(user_id, status_)
+    return status_
+
+def revoke_user_status(user_id: UUID):
+    """Forces the next request of this user to re-read role/is_left from the DB."""
+    user_status_cache.pop(user_id)
+
+async def get_current_principal(token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_async_db)]) -> Principal:
+    """
+    Trusts the verified `id`/`email` claims instead of loading the full polymorphic User row.
+    Role and is_left come from the short-TTL status cache so revocations still apply.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id = UUID(str(payload.get("id")))
+        current_email: str = payload.get("email")
+    except (JWTError, ValueError):
+        raise credentials_exception
+    if current_email is None:
+        raise credentials_exception
+    user_status = user_status_cache.get(user_id)
+    if user_status is None:
+        user_status = await db.run_sync(get_user_status, user_id)
+    if user_status is None:
+        raise credentials_exception
+    role, is_left = user_status
+    return Principal(id=user_id, email=current_email, role=role, is_left=is_left)
+
+async def get_current_active_principal(current_user: Principal = Depends(get_current_principal)):
+    if current_user.is_left:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+    return current_user
@@ -1,18 +1,13 @@
 # fastapi 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import Annotated
 from app.core.dependencies import get_db, oauth2_scheme 
 from app.schemas.user import User, UserCreate, UserUpdate, UserCounts
 from app.api.endpoints.user import functions as user_functions
+from app.utils import pagination, stats
 from app.models.user import User as Usermodel
 from app.models.admin import Admin
-from app.models.student import Student
-from app.models.teacher import Teacher
-from app.models.exam_bundle import ExamBundle
-from app.models.question import Question
-from app.models.subject import Subject
-from app.models.student_class import StudentClass
 from uuid import UUID
 
 
@@ -24,8 +19,10 @@ router = APIRouter()
 #     return {"msg": "Auth page Initialization done"}
 
 # create new user 
+# Plain `def`: hashing the password blocks until the hashing pool is done, which must
+# happen on a threadpool thread, not on the event loop
 @router.post('/', response_model=User)
-async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     db_user = user_functions.get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="User already exists")
@@ -34,8 +31,8 @@ async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
 
 # get all user 
 @router.get('/', response_model=list[User])
-async def read_all_user( skip: int = 0, limit: int = 100,  db: Session = Depends(get_db)):
-    return user_functions.read_all_user(db, skip, limit)
+async def read_all_user(response: Response, page: pagination.PageParams = Depends(), db: Session = Depends(get_db)):
+    return user_functions.read_all_user(db, page, response)
 
 
 #=============================
@@ -46,28 +43,12 @@ def get_user_counts(
 ):
     """
     Returns the total number of students, teachers, and admins.
-    Requires admin privileges.
+    Requires admin privileges. Served from a short-TTL cache that create/delete endpoints reset.
     """
     try:
-        total_students = db.query(Student).count()
-        total_teachers = db.query(Teacher).count()
-        total_admins = db.query(Admin).count()
-        total_users = db.query(Usermodel).count()
-        total_exams = db.query(ExamBundle).count()
-        total_questions = db.query(Question).count()
-        total_subjects = db.query(Subject).count()
-        total_classes = db.query(StudentClass).count()
-
-        return UserCounts(
-            total_students=total_students,
-            total_teachers=total_teachers,
-            total_admins=total_admins,
-            total_users=total_users,
-            total_exams=total_exams,
-            total_questions=total_questions,
-            total_subjects=total_subjects,
-            total_classes=total_classes
-        )
+        # One aggregate query, cached for a few seconds; cache_age_seconds says how stale it is
+        counts, cache_age_seconds = stats.get_counts(db)
+        return UserCounts(**counts, cache_age_seconds=round(cache_age_seconds, 3))
     except Exception as e:
         print(f"Error fetching user counts: {e}")
         raise HTTPException(
@@ -90,6 +71,17 @@ async def read_current_user(current_user: Annotated[User, Depends(user_functions
 async def read_user_by_id( user_id: UUID, db: Session = Depends(get_db)):
     return user_functions.get_user_by_id(db, user_id)
 
+@router.get('/{user_id}/profile_picture')
+def get_profile_picture(user_id: UUID, db: Session = Depends(get_db)):
+    # profile_picture is deferred on the model; select just that column here
+    row = db.query(Usermodel.profile_picture).filter(Usermodel.id == user_id).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if not row.profile_picture:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile picture not found for this user")
+
+    return Response(content=row.profile_picture, media_type="image/jpeg")
+
 @router.patch('/{user_id}', 
               response_model=User,
             #   dependencies=[Depends(RoleChecker(['admin']))]
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.api.routers.user import user_router
+from app.api.endpoints.admin.admin import router as admin_router
 from app.api.endpoints.book.book import router as book_router
 from app.api.endpoints.exam_bundle.exam_bundle import router as exam_bundle_router
 from app.api.endpoints.question.question import router as question_router
@@ -8,15 +9,19 @@ from app.api.endpoints.student.student import router as student_router
 from app.api.endpoints.teacher.teacher import router as teacher_router
 from app.api.endpoints.student_exam import router as student_exam_router
 from app.api.endpoints.practice_mode import router as practice_mode_router
+from app.api.endpoints.metrics.metrics import router as metrics_router
 
 router = APIRouter()
 
 router.include_router(user_router)
+router.include_router(admin_router)
 router.include_router(book_router)
 router.include_router(exam_bundle_router)
 router.include_router(question_router)
 router.include_router(subject_router)
+# student_exam_router first: its fixed /student/... paths would otherwise be captured by /student/{student_id}
+router.include_router(student_exam_router)
 router.include_router(student_router)
 router.include_router(teacher_router)
-router.include_router(student_exam_router)
-router.include_router(practice_mode_router)
\ No newline at end of file
+router.include_router(practice_mode_router)
+router.include_router(metrics_router)
\ No newline at end of file
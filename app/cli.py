@@ -0,0 +1,42 @@
+"""
+One-shot management commands, kept out of the app's import path so workers start fast:
+
+    (venv)$ python -m app.cli init-db           # create tables and the initial admin
+    (venv)$ python -m app.cli sweep-deadlines   # grade attempts left in progress past their deadline
+"""
+import argparse
+import asyncio
+
+from app.core.settings import configure_logging
+
+
+def init_db(args):
+    # Imported here so `--help` doesn't load the models
+    from app.core.database import init_db
+
+    init_db()
+
+
+def sweep_deadlines(args):
+    from app.utils.deadline_sweeper import DeadlineSweeper
+
+    print(f"Graded {asyncio.run(DeadlineSweeper().sweep())} expired exam attempts.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "init-db", help="Create the database tables and the initial admin (safe to run concurrently)"
+    ).set_defaults(handler=init_db)
+    commands.add_parser(
+        "sweep-deadlines", help="Grade exam attempts left in progress past their deadline (the app also does this)"
+    ).set_defaults(handler=sweep_deadlines)
+
+    args = parser.parse_args()
+    configure_logging()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,36 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
+from app.core.metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from app.core.query_stats import instrument_engine
+
+
+def pool_options(url: str, poolclass) -> dict:
+    # SQLite (load-test stand-in) keeps SQLAlchemy's default pool; the sizing knobs only apply to server databases
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 
 Base = declarative_base()
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL, InstrumentedQueuePool))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for the hot student-facing routers; sqladmin and the rest stay on the sync engine
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL, **pool_options(settings.ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Per-request query count and DB time (Server-Timing, request logs) plus the slow-query log
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
@@ -1,9 +1,31 @@
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
 from app.core.settings import settings
-from app.api.endpoints.user.functions import get_password_hash
+from app.core.hashing import hash_password
 from app.models import User, Admin
 from app.utils.constant.globals import UserRole
 from app.core.base import Base, engine, SessionLocal
 
+# Arbitrary application-wide key for pg_advisory_lock; serialises init_db across processes
+INIT_DB_LOCK_KEY = 4_721_906_318
+
+
+@contextmanager
+def advisory_lock(connection: Connection, key: int):
+    """Holds a session-level Postgres advisory lock on `connection`; other databases run unlocked."""
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+
 
 def create_db_tables():
     """Creates all database tables defined in Base.metadata."""
@@ -34,7 +56,7 @@ def create_initial_admin():
                 print("Please set these environment variables or define them in app.core.settings.py.")
                 return
 
-            hashed_password = get_password_hash(admin_password)
+            hashed_password = hash_password(admin_password)
 
             # Assuming Admin model inherits from User and sets the role correctly
             initial_admin = Admin(
@@ -56,6 +78,18 @@ def create_initial_admin():
     finally:
         db.close()
 
+def init_db():
+    """
+    Creates the tables and the initial admin. Run once per deploy (`python -m app.cli init-db`)
+    or from the app's startup when INIT_DB_ON_STARTUP is set; the advisory lock makes workers
+    starting together queue up, and the later ones find everything in place.
+    """
+    with engine.connect() as connection:
+        with advisory_lock(connection, INIT_DB_LOCK_KEY):
+            create_db_tables()
+            create_initial_admin()
+        connection.commit()
+
 def get_db():
     """Dependency to get a database session."""
     db = SessionLocal()
@@ -1,6 +1,6 @@
 from fastapi.security import OAuth2PasswordBearer
 
-from app.core.base import SessionLocal
+from app.core.base import SessionLocal, AsyncSessionLocal
 
 # db connection
 def get_db():
@@ -10,6 +10,11 @@ def get_db():
 	finally:
 		db.close()
 
+# async db connection
+async def get_async_db():
+	async with AsyncSessionLocal() as db:
+		yield db
+
 # authorization 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
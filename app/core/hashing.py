@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.metrics import Histogram
+from app.core.settings import settings
+
+# Password hashing is deliberately slow (~250ms of CPU per bcrypt call at cost 12). It runs on
+# its own small thread pool so a class logging in at once neither blocks the event loop nor
+# starves the threadpool the sync endpoints run on; bcrypt releases the GIL while it works.
+# Work beyond the workers waits in the pool's queue up to PASSWORD_HASH_MAX_QUEUE, after which
+# requests are refused with 503 + Retry-After instead of piling up until clients time out.
+
+HASH_SCHEMES = ("bcrypt", "argon2")
+
+
+def _build_context() -> CryptContext:
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if scheme not in HASH_SCHEMES:
+        raise RuntimeError(f"PASSWORD_HASH_SCHEME must be one of {HASH_SCHEMES}, got {scheme!r}")
+    # bcrypt stays verifiable after switching to argon2; such hashes are upgraded on the next login
+    schemes = [scheme] if scheme == "bcrypt" else [scheme, "bcrypt"]
+    context = CryptContext(schemes=schemes, deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+    if not context.handler(scheme).has_backend():
+        raise RuntimeError(f"PASSWORD_HASH_SCHEME={scheme!r} needs its backend installed (argon2-cffi for argon2)")
+    return context
+
+
+pwd_context = _build_context()
+hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="hash")
+
+
+class HashingMetrics:
+    def __init__(self):
+        self.wait_ms = Histogram()  # time queued behind other hashes
+        self.duration_ms = Histogram()  # time spent hashing
+        self.in_flight = 0  # queued + running
+        self.peak_in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "scheme": settings.PASSWORD_HASH_SCHEME,
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "queue_depth": max(0, self.in_flight - settings.PASSWORD_HASH_WORKERS),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "rejected": self.rejected,
+            "wait_ms": self.wait_ms.snapshot(),
+            "duration_ms": self.duration_ms.snapshot(),
+        }
+
+
+hashing_metrics = HashingMetrics()
+
+
+def _timed(func, submitted_at: float, *args):
+    started = time.perf_counter()
+    hashing_metrics.wait_ms.observe((started - submitted_at) * 1000)
+    try:
+        return func(*args)
+    finally:
+        hashing_metrics.duration_ms.observe((time.perf_counter() - started) * 1000)
+
+
+def _submit(func, *args) -> Future:
+    if not hashing_metrics.admit():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is saturated, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    future = hash_executor.submit(_timed, func, time.perf_counter(), *args)
+    future.add_done_callback(lambda _: hashing_metrics.release())
+    return future
+
+
+# Sync callers (the `def` endpoints, startup, scripts) block their own thread, not the event loop
+def hash_password(password: str) -> str:
+    return _submit(pwd_context.hash, password).result()
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return _submit(pwd_context.verify, password, hashed).result()
+
+
+# Async callers (login) await the pool without holding the event loop
+async def verify_and_update_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash or None); a new hash is returned when `hashed` uses an outdated scheme or cost."""
+    return await asyncio.wrap_future(_submit(pwd_context.verify_and_update, password, hashed))
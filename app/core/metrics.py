@@ -0,0 +1,77 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (milliseconds) shared by every latency histogram in the app
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; cheap enough to update on every checkout."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets_ms, value_ms)] += 1
+            self._sum_ms += value_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [str(b) for b in self.buckets_ms] + ["+Inf"]
+            return {
+                "buckets": dict(zip(labels, self._counts)),
+                "count": sum(self._counts),
+                "sum_ms": round(self._sum_ms, 3),
+            }
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait_ms = Histogram()
+        self.timeouts = 0
+
+    def snapshot(self, pool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "timeouts": self.timeouts,
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+
+pool_metrics: Dict[str, PoolMetrics] = {"sync": PoolMetrics(), "async": PoolMetrics()}
+
+
+class PoolWaitTimingMixin:
+    """Times how long each checkout waited for a free connection and counts pool timeouts."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+
+
+class InstrumentedQueuePool(PoolWaitTimingMixin, QueuePool):
+    metrics = pool_metrics["sync"]
+
+
+class InstrumentedAsyncQueuePool(PoolWaitTimingMixin, AsyncAdaptedQueuePool):
+    metrics = pool_metrics["async"]
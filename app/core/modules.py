@@ -6,10 +6,14 @@ from typing import List
 
 # import 
 from app.core.base import engine
-from app.api.routers.main_router import router
 from app.core.settings import settings
+from app.core.query_stats import QueryStatsMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 def init_routers(app_: FastAPI) -> None:
+    # Imported here so the endpoint modules load only when an app is built, not for the CLI or scripts
+    from app.api.routers.main_router import router
+
     app_.include_router(router, prefix=settings.API_V1_STR)
 
 origins = [
@@ -28,7 +32,10 @@ def make_middleware() -> List[Middleware]:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=[NEXT_CURSOR_HEADER],
         ),
+        # Innermost, so its timing covers the routers and not the CORS handling
+        Middleware(QueryStatsMiddleware),
         # Middleware(SQLAlchemyMiddleware),
     ]
     return middleware
\ No newline at end of file
@@ -0,0 +1,121 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import settings
+
+# Per-request SQL accounting. The middleware puts a fresh RequestQueryStats in a context
+# variable; the engine hooks below add to it. Sync endpoints run in a threadpool and the
+# AsyncSession routers go through greenlets, but both inherit the request's context, so
+# every statement issued while serving the request lands on the same object.
+
+logger = logging.getLogger("app.requests")
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_current_stats: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+
+
+class RequestQueryStats:
+    def __init__(self, scope: Scope):
+        self._scope = scope
+        self.count = 0
+        self.duration_ms = 0.0
+
+    @property
+    def route(self) -> str:
+        # Route template ("/api/v1/book/{book_id}/pdf") once the router has matched, raw path before that
+        route = self._scope.get("route")
+        return getattr(route, "path", None) or self._scope.get("path", "")
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.duration_ms += elapsed_ms
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started_at"].pop()) * 1000
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(elapsed_ms)
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed_ms, 3),
+            "route": stats.route if stats is not None else None,
+            "statement": statement,
+        }))
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; drop its start time
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attaches the query counter/timer to a sync engine (pass `async_engine.sync_engine` for async ones)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    Adds `Server-Timing: db;desc="N queries";dur=..., total;dur=...` to every HTTP response
+    and logs one structured line per request with its query count and DB time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;desc="{stats.count} queries";dur={stats.duration_ms:.1f}, total;dur={total_ms:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            logger.info(json.dumps({
+                "event": "request",
+                "method": scope["method"],
+                "route": stats.route,
+                "status": status_code,
+                "db_queries": stats.count,
+                "db_ms": round(stats.duration_ms, 3),
+                "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            }))
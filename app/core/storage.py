@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from app.core.settings import settings
+
+
+@dataclass
+class StoredBlob:
+    key: str
+    size: int
+
+
+class BlobStore(ABC):
+    """Content-addressed blob storage: the key of a blob is the sha256 of its bytes."""
+
+    @abstractmethod
+    def put(self, data: bytes) -> StoredBlob:
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path of the blob when the backend has one, else None."""
+        return None
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as blob:
+            return blob.read()
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def lock_id(key: str) -> int:
+        """Postgres advisory lock id for a blob key (the first 60 bits of its sha256)."""
+        return int(key[:15], 16)
+
+
+class LocalBlobStore(BlobStore):
+    """Stores blobs on disk as <root>/ab/cd/<sha256>; identical files are written once."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data: bytes) -> StoredBlob:
+        key = self.key_for(data)
+        path = self.local_path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write-then-rename so readers never see a partial file
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        return StoredBlob(key=key, size=len(data))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).exists()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.local_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+BLOB_STORE_BACKENDS = {
+    "local": lambda: LocalBlobStore(settings.BLOB_STORE_DIR),
+}
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    try:
+        return BLOB_STORE_BACKENDS[settings.BLOB_STORE_BACKEND]()
+    except KeyError:
+        raise ValueError(f"Unknown BLOB_STORE_BACKEND '{settings.BLOB_STORE_BACKEND}'")
@@ -1,23 +1,44 @@
 # fastapi
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
+from fastapi.concurrency import run_in_threadpool
 from app.core.modules import init_routers, make_middleware
-from app.core.database import create_db_tables, create_initial_admin
+from app.core.settings import settings, configure_logging
+from app.core.database import init_db
+from app.utils import answer_buffer, deadline_sweeper
 from app.core.base import engine
 import app.models 
 from sqladmin import Admin
 from app.models.sqladmin import UserAdmin, TeacherAdmin, AdminUserAdmin, StudentAdmin, BookAdmin, SubjectAdmin, QuestionAdmin, ExamBundleAdmin, TermAdmin, SessionAdmin
 
 
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    configure_logging()
+    if settings.INIT_DB_ON_STARTUP:
+        await run_in_threadpool(init_db)
+    if settings.AUTOSAVE_WRITE_BEHIND:
+        await answer_buffer.buffer.start()
+    if settings.DEADLINE_SWEEPER:
+        await deadline_sweeper.sweeper.start()
+    yield
+    if settings.DEADLINE_SWEEPER:
+        await deadline_sweeper.sweeper.stop()
+    if settings.AUTOSAVE_WRITE_BEHIND:
+        await answer_buffer.buffer.stop()  # final flush; whatever fails stays in the journal
+
+
 def create_app() -> FastAPI:
+    # No I/O here, since every worker imports this module: tables and the initial admin come
+    # from `python -m app.cli init-db` (or the lifespan hook above when INIT_DB_ON_STARTUP is set)
     app_ = FastAPI(
         title="Glory Schools Exam App",
         description="This is the Exam and E-learning app for Glory Schools.",
         version="1.0.0",
         # dependencies=[Depends(Logging)],
         middleware=make_middleware(),
+        lifespan=lifespan,
     )
-    create_db_tables()
-    create_initial_admin()
 
     init_routers(app_=app_)
     return app_
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, ForeignKey
+from sqlalchemy import Table, Column, ForeignKey, Index
 from app.core.base import Base
 
 book_user_likes_association = Table(
@@ -13,4 +13,6 @@ exam_bundle_student_classes_association = Table(
     Base.metadata,
     Column("exam_bundle_id", ForeignKey("exam_bundles.id", ondelete="CASCADE"), primary_key=True),
     Column("student_class_id", ForeignKey("student_classes.id", ondelete="CASCADE"), primary_key=True),
+    # Reverse of the PK: a class's available exams
+    Index("ix_exam_bundle_student_classes_student_class_id", "student_class_id", "exam_bundle_id"),
 )
\ No newline at end of file
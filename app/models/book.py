@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Enum, Integer, LargeBinary, ForeignKey, Table
+from sqlalchemy import Column, String, Enum, Integer, LargeBinary, ForeignKey, Table, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from enum import Enum as PythonEnum
 
 from app.core.base import Base
@@ -12,11 +12,24 @@ from .common import CommonModel
 
 class Book(CommonModel):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination (app/utils/pagination.py) of the /all listing: ORDER BY created_at, id
+        Index("ix_books_created_at_id", "created_at", "id"),
+    )
 
     name = Column(String, nullable=False)
     uploaded_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    cover_image = Column(LargeBinary, nullable=True)
-    pdf = Column(LargeBinary, nullable=True)
+    # Blob store keys (sha256 of the content) plus size and mime type; the bytes live in the blob store
+    cover_image_key = Column(String(64), nullable=True)
+    cover_image_size = Column(Integer, nullable=True)
+    cover_image_mime = Column(String, nullable=True)
+    # Resized covers, e.g. {"thumb.webp": {"key": ..., "size": ..., "mime": ...}}; cover_image_key is "thumb.jpeg"
+    cover_renditions = Column(JSON, nullable=True)
+    pdf_key = Column(String(64), nullable=True)
+    pdf_size = Column(Integer, nullable=True)
+    pdf_mime = Column(String, nullable=True)
+    has_cover_image = column_property(cover_image_key.isnot(None))
+    has_pdf = column_property(pdf_key.isnot(None))
     likes = relationship("User", secondary=book_user_likes_association, back_populates="liked_books")
     views = Column(Integer, default=0, nullable=False)
 
@@ -27,15 +40,17 @@ class Book(CommonModel):
     def likes_count(self) -> int:
         return len(self.likes)
 
-    @property
-    def has_cover_image(self) -> bool:
-        return self.cover_image is not None
-
-    @property
-    def has_pdf(self) -> bool:
-        return self.pdf is not None
-
     def __repr__(self):
         return f"{self.name}"
 
+# Every blob key a book references (cover, cover renditions, PDF), so "is this blob still used?"
+# is an index lookup instead of a scan of the books' JSON
+book_blobs = Table(
+    "book_blobs",
+    Base.metadata,
+    Column("key", String(64), primary_key=True),
+    Column("book_id", ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_book_blobs_book_id", "book_id"),
+)
+
 metadata = Base.metadata
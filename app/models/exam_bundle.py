@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Enum, Integer, LargeBinary, ForeignKey, Table, Interval, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Enum, Integer, LargeBinary, ForeignKey, Table, Interval, Boolean, JSON, Index, func, select
+from sqlalchemy.orm import relationship, column_property
 from enum import Enum as PythonEnum
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -10,6 +10,10 @@ from .associations import exam_bundle_student_classes_association
 
 class ExamBundle(CommonModel):
     __tablename__ = "exam_bundles"
+    __table_args__ = (
+        # Keyset pagination (app/utils/pagination.py) of the /all listing: ORDER BY created_at, id
+        Index("ix_exam_bundles_created_at_id", "created_at", "id"),
+    )
 
     name = Column(String, nullable=False)
     time_in_mins = Column(Interval, nullable=False) 
@@ -38,6 +42,18 @@ exam_bundle_questions = Table(
     Base.metadata,
     Column("exam_bundle_id", ForeignKey("exam_bundles.id"), primary_key=True),
     Column("question_id", ForeignKey("questions.id"), primary_key=True),
+    # The PK serves bundle -> questions; this serves question -> bundles (cache invalidation, deletes)
+    Index("ix_exam_bundle_questions_question_id", "question_id", "exam_bundle_id"),
+)
+
+# Counted in SQL (a correlated COUNT over the association PK) so listings never load the questions.
+# Deferred: undefer(ExamBundle.question_count) where it is needed.
+ExamBundle.question_count = column_property(
+    select(func.count())
+    .where(exam_bundle_questions.c.exam_bundle_id == ExamBundle.id)
+    .correlate_except(exam_bundle_questions)
+    .scalar_subquery(),
+    deferred=True,
 )
 
 
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, ForeignKey, DateTime, Integer, Enum as SAEnum, Float, JSON, String
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, Enum as SAEnum, Float, JSON, String, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -13,6 +13,10 @@ class PracticeSessionStatus(enum.Enum):
 
 class PracticeSession(CommonModel):
     __tablename__ = "practice_sessions"
+    __table_args__ = (
+        # History: WHERE student_id = ? ORDER BY start_time DESC
+        Index("ix_practice_sessions_student_id_start_time", "student_id", "start_time"),
+    )
 
     student_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
@@ -1,15 +1,15 @@
-from sqlalchemy import Column, ForeignKey, Text, Boolean, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, Text, Boolean, Float, select
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.dialects.postgresql import UUID
-from typing import Optional, Any # Added for correct_answer property
 
 from app.core.base import Base
 from app.models.common import CommonModel
+from app.models.question import Question
 
 class PracticeSessionAnswer(CommonModel):
     __tablename__ = "practice_session_answers"
 
-    practice_session_id = Column(UUID(as_uuid=True), ForeignKey("practice_sessions.id", ondelete="CASCADE"), nullable=False)
+    practice_session_id = Column(UUID(as_uuid=True), ForeignKey("practice_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False) # ondelete="CASCADE" removed
 
     selected_answer = Column(Text, nullable=True)
@@ -20,11 +20,12 @@ class PracticeSessionAnswer(CommonModel):
     practice_session = relationship("PracticeSession", back_populates="answers")
     question = relationship("Question")
 
-    @property
-    def correct_answer(self) -> Optional[Any]:
-        if self.question:
-            return self.question.answer
-        return None
+    # The answer key as a correlated scalar subquery, so reviews read one column instead of
+    # loading a Question per answer. Deferred: undefer(...correct_answer) where it is shown.
+    correct_answer = column_property(
+        select(Question.answer).where(Question.id == question_id).scalar_subquery(),
+        deferred=True,
+    )
 
     def __repr__(self):
         return f"<PracticeSessionAnswer session_id={self.practice_session_id} question_id={self.question_id} is_correct={self.is_correct}>"
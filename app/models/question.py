@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Enum, LargeBinary, ForeignKey, Text, JSON, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Enum, LargeBinary, ForeignKey, Text, JSON, Integer, Index
+from sqlalchemy.orm import relationship, deferred, column_property
 from enum import Enum as PythonEnum
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.base import Base
@@ -10,10 +10,20 @@ from .common import CommonModel
 
 class Question(CommonModel):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Random-pivot sampling (app/utils/sampling.py) seeks `WHERE <filters> AND id >= :pivot ORDER BY id`:
+        # per-subject for bundle assembly, and subject + type + year for filtered practice sessions
+        Index("ix_questions_subject_id_id", "subject_id", "id"),
+        Index("ix_questions_subject_id_type_year_id", "subject_id", "type", "year", "id"),
+        # Keyset pagination (app/utils/pagination.py) of the /all listing: ORDER BY created_at, id
+        Index("ix_questions_created_at_id", "created_at", "id"),
+    )
 
     type = Column(Enum(QuestionType), default=QuestionType.SCHOOL, nullable=False)
     subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"), nullable=False)
-    question_image = Column(LargeBinary, nullable=True)
+    # Deferred: only GET /question/{id}/image loads the bytes; everything else reads has_question_image
+    question_image = deferred(Column(LargeBinary, nullable=True))
+    has_question_image = column_property(question_image.expression.isnot(None))
     question_text = Column(Text, nullable=False)
     options = Column(JSON, nullable=False) # e.g., {"A": "Option 1", "B": "Option 2"}
     answer = Column(String, nullable=False) # e.g., "A" or the text of the correct option
@@ -10,7 +10,7 @@ class Student(User):
     id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
     admin_no = Column(String, unique=True, index=True, nullable=False)
     date_of_birth = Column(Date, nullable=True)
-    student_class_id = Column(UUID(as_uuid=True), ForeignKey("student_classes.id"), nullable=True)
+    student_class_id = Column(UUID(as_uuid=True), ForeignKey("student_classes.id"), nullable=True, index=True)
 
     student_class = relationship("StudentClass", back_populates="students")
 
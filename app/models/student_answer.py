@@ -1,14 +1,18 @@
-from sqlalchemy import Column, ForeignKey, Text, Boolean, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, Text, Boolean, Float, Index, select
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.dialects.postgresql import UUID
-from typing import Optional, Any # Added Optional, Any
 
 from app.core.base import Base
 from app.models.common import CommonModel
-# from app.models.question import Question # Not strictly needed if relationship is just "Question" string
+from app.models.question import Question
 
 class StudentAnswer(CommonModel):
     __tablename__ = "student_answers"
+    __table_args__ = (
+        # One row per question in an attempt: autosave and submit upsert against it. Its leading
+        # column also serves the per-attempt lookups (review, grading)
+        Index("uq_student_answers_attempt_question", "student_exam_attempt_id", "question_id", unique=True),
+    )
 
     student_exam_attempt_id = Column(UUID(as_uuid=True), ForeignKey("student_exam_attempts.id", ondelete="CASCADE"), nullable=False)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
@@ -21,11 +25,12 @@ class StudentAnswer(CommonModel):
     attempt = relationship("StudentExamAttempt", back_populates="answers")
     question = relationship("Question") # No back_populates needed here to avoid cluttering Question model unless desired
 
-    @property
-    def correct_answer(self) -> Optional[Any]:
-        if self.question:
-            return self.question.answer
-        return None
+    # The answer key as a correlated scalar subquery, so reviews read one column instead of
+    # loading a Question per answer. Deferred: undefer(...correct_answer) where it is shown.
+    correct_answer = column_property(
+        select(Question.answer).where(Question.id == question_id).scalar_subquery(),
+        deferred=True,
+    )
 
     def __repr__(self):
         return f"<StudentAnswer attempt_id={self.student_exam_attempt_id} question_id={self.question_id} is_correct={self.is_correct}>"
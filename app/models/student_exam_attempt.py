@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Enum as SAEnum, Float
+from sqlalchemy import Column, ForeignKey, DateTime, Enum as SAEnum, Float, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import enum
@@ -11,14 +11,36 @@ class ExamAttemptStatus(enum.Enum):
     COMPLETED = "completed" # Answers submitted by student
     GRADED = "graded"       # Auto-grading complete, score available
 
+# SAEnum stores member names, so partial-index predicates compare against 'IN_PROGRESS'
+IN_PROGRESS_PREDICATE = text("status = 'IN_PROGRESS'")
+
 class StudentExamAttempt(CommonModel):
     __tablename__ = "student_exam_attempts"
+    __table_args__ = (
+        # At most one in-progress attempt per student and bundle, enforced by the database;
+        # it is also the index behind start_exam_attempt's lookup
+        Index(
+            "uq_student_exam_attempts_in_progress", "student_id", "exam_bundle_id",
+            unique=True, postgresql_where=IN_PROGRESS_PREDICATE, sqlite_where=IN_PROGRESS_PREDICATE,
+        ),
+        # History: WHERE student_id = ? ORDER BY start_time DESC
+        Index("ix_student_exam_attempts_student_id_start_time", "student_id", "start_time"),
+        # Deadline sweeper: in-progress attempts ORDER BY deadline; only ever as large as the
+        # number of exams being sat right now
+        Index(
+            "ix_student_exam_attempts_in_progress_deadline", "deadline",
+            postgresql_where=IN_PROGRESS_PREDICATE, sqlite_where=IN_PROGRESS_PREDICATE,
+        ),
+    )
 
     student_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     exam_bundle_id = Column(UUID(as_uuid=True), ForeignKey("exam_bundles.id", ondelete="CASCADE"), nullable=False)
 
     start_time = Column(DateTime(timezone=True), nullable=False)
     submission_time = Column(DateTime(timezone=True), nullable=True) # Time when answers were submitted
+    # start_time + the bundle's time_in_mins, fixed at start; past it (plus a grace period)
+    # answers are refused and the deadline sweeper grades whatever was saved
+    deadline = Column(DateTime(timezone=True), nullable=True)
 
     score = Column(Float, nullable=True) # Overall score, can be percentage or raw score
     status = Column(SAEnum(ExamAttemptStatus), nullable=False, default=ExamAttemptStatus.IN_PROGRESS)
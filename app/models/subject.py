@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.base import Base
@@ -7,6 +7,10 @@ from .common import CommonModel
 
 class Subject(CommonModel):
     __tablename__ = "subjects"
+    __table_args__ = (
+        # Keyset pagination (app/utils/pagination.py) of the /all listing: ORDER BY created_at, id
+        Index("ix_subjects_created_at_id", "created_at", "id"),
+    )
 
     name = Column(String, nullable=False, unique=True)  
     teachers = relationship(
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Enum, Boolean, LargeBinary, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Enum, Boolean, LargeBinary, ForeignKey, Table, Index
+from sqlalchemy.orm import relationship, deferred, column_property
 from enum import Enum as PythonEnum
 from app.core.base import Base
 from app.utils.constant.globals import UserRole
@@ -10,6 +10,10 @@ from .common import CommonModel
 
 class User(CommonModel):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination (app/utils/pagination.py) of the /all listing: ORDER BY created_at, id
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     email = Column(String, unique=True, nullable=False, index=True)
     password = Column(String, nullable=False)
@@ -17,7 +21,9 @@ class User(CommonModel):
     last_name = Column(String, nullable=True)
     role = Column(Enum(UserRole), default=UserRole.USER, nullable=False) 
     is_left = Column(Boolean, default=False, nullable=False)  # Made not nullable
-    profile_picture = Column(LargeBinary, nullable=True)
+    # Deferred so loading the current user on every request doesn't drag the picture along
+    profile_picture = deferred(Column(LargeBinary, nullable=True))
+    has_profile_picture = column_property(profile_picture.expression.isnot(None))
 
     # Relationships
     uploaded_books = relationship("Book", back_populates="uploaded_by")
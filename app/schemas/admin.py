@@ -5,6 +5,8 @@ class AdminBase(UserBase):
 
 class AdminCreate(AdminBase):
     password: str
+    first_name: str | None = None
+    last_name: str | None = None
 
 class AdminSchema(UserSchema):
     # Admin-specific fields, if any, would go here.
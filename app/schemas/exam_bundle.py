@@ -17,6 +17,19 @@ class ExamBundleCreate(ExamBundleBase):
     uploaded_by_id: UUID
     class_ids: List[UUID]
 
+    model_config = {'extra': 'forbid'}  # e.g. the retired questions_per_subject is rejected, not ignored
+
+
+class ExamBundleSummarySchema(ExamBundleBase):
+    # Listing shape: question_count instead of the questions themselves (see /exam_bundle/{id}/questions)
+    id: UUID
+    no_of_participants: int
+    uploaded_by_id: UUID
+    question_count: int
+    student_classes: List[StudentClassSchema] = []
+
+    model_config = {'from_attributes': True}
+
 
 class ExamBundleSchema(ExamBundleBase):
     id: UUID
@@ -0,0 +1,53 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+
+class HistogramSchema(BaseModel):
+    buckets: Dict[str, int]  # upper bound in ms -> observations in that bucket
+    count: int
+    sum_ms: float
+
+
+class PoolStatsSchema(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    timeouts: int
+    wait_ms: HistogramSchema
+
+
+class HashingStatsSchema(BaseModel):
+    scheme: str
+    workers: int
+    queue_depth: int  # hashes waiting for a worker right now
+    in_flight: int
+    peak_in_flight: int
+    rejected: int  # refused with 503 because the queue was full
+    wait_ms: HistogramSchema
+    duration_ms: HistogramSchema
+
+
+class AutosaveBufferStatsSchema(BaseModel):
+    enabled: bool
+    backlog_answers: int  # buffered, not yet in the database
+    backlog_attempts: int
+    oldest_answer_age_seconds: Optional[float] = None
+    journal_segments: int
+    flushes: int
+    failures: int
+    rows_written: int
+    rows_dropped: int  # attempt was no longer in progress at flush time
+    replayed: int  # recovered from the journals of crashed workers
+    flush_ms: HistogramSchema
+
+
+class DeadlineSweepStatsSchema(BaseModel):
+    enabled: bool
+    sweeps: int
+    failures: int
+    graded: int  # attempts auto-graded by this worker
+    last_graded: int
+    backlog: int  # expired attempts waiting when the last sweep began
+    overdue_seconds: Optional[float] = None  # how far past its cutoff the oldest of them was
+    duration_ms: HistogramSchema
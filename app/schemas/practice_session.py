@@ -17,7 +17,8 @@ class PracticeSessionBase(BaseModel):
     filter_question_type: Optional[QuestionType] = None
     filter_year: Optional[int] = None
 
-class PracticeSessionSchema(PracticeSessionBase):
+class PracticeSessionSummarySchema(PracticeSessionBase):
+    # History listings: the session without its answers
     id: UUID
     student_id: UUID
     start_time: datetime
@@ -25,6 +26,8 @@ class PracticeSessionSchema(PracticeSessionBase):
     score: Optional[float] = None
     status: PracticeSessionStatus
     question_ids: List[UUID]
-    answers: List[PracticeSessionAnswerSchema] = []
 
     model_config = {'from_attributes': True, 'use_enum_values': True}
+
+class PracticeSessionSchema(PracticeSessionSummarySchema):
+    answers: List[PracticeSessionAnswerSchema] = []
@@ -15,8 +15,22 @@ class QuestionCreate(QuestionBase):
     subject_id: UUID
 
 
+class ExamPaperQuestionSchema(BaseModel):
+    # What a student sees while sitting an exam: QuestionSchema without the answer
+    id: UUID
+    subject_id: UUID
+    type: QuestionType
+    question_text: str
+    options: dict
+    year: Optional[int] = None
+    has_question_image: bool = False
+
+    model_config = {'from_attributes': True}
+
+
 class QuestionSchema(QuestionBase):
     id: UUID
     subject_id: UUID
+    has_question_image: bool = False
 
     model_config = {'from_attributes': True}
\ No newline at end of file
@@ -6,8 +6,11 @@ class StudentBase(UserBase):
   pass
 
 class StudentCreate(StudentBase):
-  profile_picture: Optional[str]
+  admin_no: str
+  profile_picture: Optional[str] = None
   password: str
+  first_name: str | None = None
+  last_name: str | None = None
     
 class StudentSchema(UserSchema):
   admin_no: str | None = None
@@ -13,13 +13,17 @@ class StudentExamAttemptCreate(StudentExamAttemptBase):
     # start_time will be set by server
     pass # student_id will be taken from current_user, exam_bundle_id from path
 
-class StudentExamAttemptSchema(StudentExamAttemptBase):
+class StudentExamAttemptSummarySchema(StudentExamAttemptBase):
+    # History listings: the attempt without its answers
     id: UUID
     student_id: UUID
     start_time: datetime
+    deadline: Optional[datetime] = None
     submission_time: Optional[datetime] = None
     score: Optional[float] = None
     status: ExamAttemptStatus
-    answers: List[StudentAnswerSchema] = []
 
     model_config = {'from_attributes': True, 'use_enum_values': True}
+
+class StudentExamAttemptSchema(StudentExamAttemptSummarySchema):
+    answers: List[StudentAnswerSchema] = []
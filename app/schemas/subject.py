@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 import uuid
 
 class SubjectBase(BaseModel):
@@ -11,8 +12,8 @@ class SubjectCreate(SubjectBase):
 
 class SubjectSchema(SubjectBase):
     id: uuid.UUID
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
     model_config = {'from_attributes': True}
     
\ No newline at end of file
@@ -5,6 +5,8 @@ class TeacherBase(UserBase):
 
 class TeacherCreate(TeacherBase):
     password: str
+    first_name: str | None = None
+    last_name: str | None = None
     
 class TeacherSchema(UserSchema):
     pass
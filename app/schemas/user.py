@@ -19,7 +19,7 @@ class UserLogin(UserBase):
 
 class User(UserBase):
 	id: UUID
-	profile_picture: Optional[str]
+	has_profile_picture: bool = False
 	first_name: Optional[str]
 	last_name: Optional[str]
 	is_active: bool
@@ -38,12 +38,19 @@ class UserUpdate(BaseModel):
 
 class UserSchema(UserBase):
 	id: UUID
-	profile_picture: Optional[str]
+	has_profile_picture: bool = False
 	role: UserRole
 	is_left: bool
 
 	model_config = {'from_attributes': True}
 
+class Principal(BaseModel):
+	"""Authenticated caller built from verified token claims, without loading the User row."""
+	id: UUID
+	email: str
+	role: UserRole
+	is_left: bool = False
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -57,4 +64,5 @@ class UserCounts(BaseModel):
 	total_exams: int
 	total_questions: int
 	total_subjects: int
-	total_classes: int
\ No newline at end of file
+	total_classes: int
+	cache_age_seconds: float = 0.0
\ No newline at end of file
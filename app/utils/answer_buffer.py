@@ -0,0 +1,346 @@
+"""
+Write-behind buffer for exam answer autosaves (per worker; on when AUTOSAVE_WRITE_BEHIND is set).
+
+Students change answers many times over an attempt. Rather than one upsert per autosave, the
+latest answer per (attempt, question) is kept in memory and written in one batched upsert every
+AUTOSAVE_FLUSH_INTERVAL_SECONDS, or sooner once AUTOSAVE_BUFFER_MAX_ENTRIES answers are waiting.
+Submit claims the attempt's buffered answers and grades them in its own transaction.
+
+Every autosave is appended to a local journal before it is acknowledged. Flushes seal the
+current journal segment and start a new one; sealed segments are deleted once nothing they
+cover is still only in memory. Each process holds an flock on the segments it may still need,
+so on startup a worker adopts (replays, then flushes) only segments whose owner has died.
+
+Buffered answers reach the database through the worker that received them, so route a
+student's requests to one worker (sticky sessions). Submit waits out one flush interval so that
+answers buffered by other workers are usually written first, but answers whose attempt is no
+longer in progress when they are flushed are dropped (logged, and counted in `rows_dropped`).
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+
+from app.core.base import AsyncSessionLocal
+from app.core.metrics import Histogram
+from app.core.settings import settings
+from app.models.student_answer import StudentAnswer
+from app.models.student_exam_attempt import StudentExamAttempt, ExamAttemptStatus
+from app.utils.grading import upsert_answer_rows
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".jsonl"
+STAGING_SUFFIX = ".new"  # a segment being created: not yet locked, so not matched by adopters
+
+# {attempt_id: {question_id: selected_answer}}
+Answers = Dict[UUID, Dict[UUID, str]]
+
+
+class JournalSegment:
+    """One append-only journal file, flock'ed by the process that may still need it."""
+
+    def __init__(self, path: Path, file):
+        self.path = path
+        self.file = file
+
+    @classmethod
+    def create(cls, path: Path) -> "JournalSegment":
+        """A new segment, flock'ed before it shows up under its name, so no adopter can take it."""
+        staging = path.with_name(path.name + STAGING_SUFFIX)
+        file = os.fdopen(os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644), "ab")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            os.rename(staging, path)  # the flock belongs to the file, so it holds across the rename
+        except BaseException:
+            file.close()
+            staging.unlink(missing_ok=True)
+            raise
+        return cls(path, file)
+
+    @classmethod
+    def adopt(cls, path: Path) -> Optional["JournalSegment"]:
+        """Locks another process's segment, or returns None if that process is alive or it is gone."""
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None  # adopted and deleted by someone else meanwhile
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # An adopter that deleted it between our open and flock leaves us the unlinked file
+            if os.fstat(file.fileno()).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+        except (BlockingIOError, FileNotFoundError):
+            file.close()
+            return None
+        return cls(path, file)
+
+    def append(self, attempt_id: UUID, answers: Dict[UUID, str]) -> None:
+        record = {"attempt_id": str(attempt_id), "answers": {str(q): a for q, a in answers.items()}}
+        self.file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()
+        if settings.AUTOSAVE_JOURNAL_FSYNC:
+            os.fsync(self.file.fileno())
+
+    def records(self) -> Iterator[tuple]:
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a crashed writer; it was never acknowledged
+                yield UUID(record["attempt_id"]), {UUID(q): a for q, a in record["answers"].items()}
+
+    def delete(self) -> None:
+        # unlink before closing (which drops the flock) so no other worker adopts it in between
+        self.path.unlink(missing_ok=True)
+        self.file.close()
+
+
+class AnswerBufferMetrics:
+    def __init__(self):
+        self.flush_ms = Histogram()
+        self.flushes = 0
+        self.failures = 0
+        self.rows_written = 0
+        self.rows_dropped = 0  # attempt no longer in progress by the time its answers were flushed
+        self.replayed = 0  # answers recovered from dead workers' journals
+
+
+class AnswerBuffer:
+    def __init__(self, journal_dir: Path, session_factory=AsyncSessionLocal):
+        self.journal_dir = Path(journal_dir)
+        self.session_factory = session_factory
+        self.metrics = AnswerBufferMetrics()
+        self._pending: Answers = {}
+        self._backlog = 0
+        self._oldest_at: Optional[float] = None
+        self._segment: Optional[JournalSegment] = None
+        self._sealed: List[JournalSegment] = []
+        self._in_flight = 0  # flushes and claims whose answers are only in sealed segments
+        self._name = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"  # unique even if a pid is reused
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # ===================> lifecycle <===================
+    def open(self) -> None:
+        """Adopts orphaned journal segments (their answers are flushed next) and starts a new one."""
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        adopted = []
+        for path in sorted(self.journal_dir.glob("*" + JOURNAL_SUFFIX), key=_mtime):
+            segment = JournalSegment.adopt(path)
+            if segment is None:
+                continue  # a live worker's, or already adopted
+            for attempt_id, answers in segment.records():
+                self.metrics.replayed += len(answers)
+                with self._lock:
+                    self._merge(attempt_id, answers, overwrite=True)
+            adopted.append(segment)
+        with self._lock:
+            self._rotate()
+            # The replayed answers are journaled again in the live segment, like any buffered
+            # answer, so the adopted segments are not needed and no later settle can lose them
+            for attempt_id, answers in self._pending.items():
+                self._segment.append(attempt_id, answers)
+        for segment in adopted:
+            segment.delete()
+
+    async def start(self) -> None:
+        self.open()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Ask the loop to exit rather than cancel it, so a flush it is in finishes (or fails
+            # and puts its batch back) instead of being cut off mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        with self._lock:
+            if not self._pending and self._in_flight == 0 and self._segment is not None:
+                self._segment.delete()
+                self._segment = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Autosave flush failed")
+
+    # ===================> writes <===================
+    def put(self, attempt_id: UUID, answers: Dict[UUID, str]) -> None:
+        """Journals and buffers the latest answers for an attempt. Blocking (fsync): call it off the event loop."""
+        with self._lock:
+            if self._segment is None:
+                raise RuntimeError("AnswerBuffer is not open")
+            self._segment.append(attempt_id, answers)
+            self._merge(attempt_id, answers, overwrite=True)
+            full = self._backlog >= settings.AUTOSAVE_BUFFER_MAX_ENTRIES
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @contextmanager
+    def claim(self, attempt_id: UUID) -> Iterator[Dict[UUID, str]]:
+        """
+        Takes an attempt's buffered answers for the caller (submit) to write in its own
+        transaction; they go back into the buffer if the block raises.
+        """
+        with self._lock:
+            answers = self._pending.pop(attempt_id, {})
+            self._backlog -= len(answers)
+            if not self._pending:
+                self._oldest_at = None
+            self._in_flight += 1
+        returned = {attempt_id: answers}
+        try:
+            yield answers
+            returned = {}
+        finally:
+            self._settle(returned)
+
+    async def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                # First: if no new segment can be made, the batch stays buffered, not lost
+                self._rotate()  # the batch is now journaled only in sealed segments
+            batch, self._pending = self._pending, {}
+            self._backlog, self._oldest_at = 0, None
+            self._in_flight += 1
+
+        rows = [
+            {"student_exam_attempt_id": attempt_id, "question_id": question_id, "selected_answer": answer}
+            for attempt_id, answers in batch.items()
+            for question_id, answer in answers.items()
+        ]
+        if not rows:
+            self._settle({})
+            return
+
+        started = time.perf_counter()
+        returned = batch
+        try:
+            written = await self._write(rows)
+            returned = {}
+        except Exception:
+            self.metrics.failures += 1
+            logger.exception("Autosave flush of %d answers failed; they stay buffered", len(rows))
+            return
+        finally:
+            self._settle(returned)  # also on cancellation: the batch goes back, _in_flight comes down
+        self.metrics.flush_ms.observe((time.perf_counter() - started) * 1000)
+        self.metrics.flushes += 1
+        self.metrics.rows_written += written
+        self.metrics.rows_dropped += len(rows) - written
+
+    async def _write(self, rows: List[dict]) -> int:
+        attempt_ids = {row["student_exam_attempt_id"] for row in rows}
+        async with self.session_factory() as db:
+            # Row-locks the attempts (in id order) like submit does, so nothing lands after grading
+            open_ids = set((await db.execute(
+                select(StudentExamAttempt.id)
+                .where(StudentExamAttempt.id.in_(attempt_ids), StudentExamAttempt.status == ExamAttemptStatus.IN_PROGRESS)
+                .order_by(StudentExamAttempt.id)
+                .with_for_update()
+            )).scalars())
+            for row in rows:
+                if row["student_exam_attempt_id"] not in open_ids:
+                    # acknowledged to the student, never graded: another worker submitted first
+                    logger.warning(
+                        "Dropped autosaved answer to question %s of attempt %s: no longer in progress",
+                        row["question_id"], row["student_exam_attempt_id"],
+                    )
+            rows = [row for row in rows if row["student_exam_attempt_id"] in open_ids]
+            await db.run_sync(upsert_answer_rows, StudentAnswer, "student_exam_attempt_id", rows)
+            await db.commit()
+        return len(rows)
+
+    # ===================> internals (hold self._lock) <===================
+    def _merge(self, attempt_id: UUID, answers: Dict[UUID, str], overwrite: bool) -> Dict[UUID, str]:
+        current = self._pending.setdefault(attempt_id, {})
+        merged = {}
+        for question_id, answer in answers.items():
+            if question_id in current and not overwrite:
+                continue  # a newer answer arrived meanwhile
+            if question_id not in current:
+                self._backlog += 1
+            current[question_id] = merged[question_id] = answer
+        if not current:
+            del self._pending[attempt_id]
+        elif self._oldest_at is None:
+            self._oldest_at = time.monotonic()
+        return merged
+
+    def _rotate(self) -> None:
+        self._seq += 1
+        segment = JournalSegment.create(self.journal_dir / f"{self._name}-{self._seq:06d}{JOURNAL_SUFFIX}")
+        if self._segment is not None:
+            self._sealed.append(self._segment)
+        self._segment = segment
+
+    def _settle(self, returned: Answers) -> None:
+        """Ends a flush/claim: unwritten answers go back (journaled again), finished segments go away."""
+        with self._lock:
+            for attempt_id, answers in returned.items():
+                merged = self._merge(attempt_id, answers, overwrite=False)
+                if merged and self._segment is not None:
+                    # their old segment may be deleted below, so keep them in the current one
+                    self._segment.append(attempt_id, merged)
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                for segment in self._sealed:
+                    segment.delete()
+                self._sealed = []
+
+    # ===================> metrics <===================
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.AUTOSAVE_WRITE_BEHIND,
+                "backlog_answers": self._backlog,
+                "backlog_attempts": len(self._pending),
+                "oldest_answer_age_seconds": (
+                    round(time.monotonic() - self._oldest_at, 3) if self._oldest_at is not None else None
+                ),
+                "journal_segments": len(self._sealed) + (self._segment is not None),
+                "flushes": self.metrics.flushes,
+                "failures": self.metrics.failures,
+                "rows_written": self.metrics.rows_written,
+                "rows_dropped": self.metrics.rows_dropped,
+                "replayed": self.metrics.replayed,
+                "flush_ms": self.metrics.flush_ms.snapshot(),
+            }
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+buffer = AnswerBuffer(settings.AUTOSAVE_JOURNAL_DIR)
@@ -0,0 +1,102 @@
+import threading
+from typing import Callable, Dict, List
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.models.exam_bundle import exam_bundle_questions
+from app.models.question import Question
+from app.schemas.question import ExamPaperQuestionSchema
+from app.utils.cache import LRUCache, TTLCache
+from app.utils.grading import load_bundle_answer_key
+
+# Entries are per worker. Edits invalidate them in the worker that served the edit; every other
+# worker picks the change up when the entry expires (BUNDLE_CACHE_TTL_SECONDS).
+# {exam_bundle_id: {question_id: normalized answer}}
+answer_keys = TTLCache(ttl=settings.BUNDLE_CACHE_TTL_SECONDS, maxsize=settings.ANSWER_KEY_CACHE_SIZE)
+# {exam_bundle_id: JSON bytes of the answer-stripped question list}
+papers = TTLCache(ttl=settings.BUNDLE_CACHE_TTL_SECONDS, maxsize=settings.EXAM_PAPER_CACHE_SIZE)
+
+_paper_adapter = TypeAdapter(List[ExamPaperQuestionSchema])
+_MISSING = object()
+
+
+class _Loads:
+    """Loads of one bundle in flight, and how many invalidations happened while any of them ran."""
+
+    __slots__ = ("in_flight", "generation")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.generation = 0
+
+
+# {exam_bundle_id: _Loads}; only bundles with a load in flight, so it stays as small as the
+# number of concurrent cache misses. A load that overlapped an invalidation is not cached.
+_loads: Dict[UUID, _Loads] = {}
+_loads_lock = threading.Lock()
+
+
+def _cached(cache: LRUCache, exam_bundle_id: UUID, load: Callable[[], object]):
+    value = cache.get(exam_bundle_id)
+    if value is None:
+        with _loads_lock:
+            loads = _loads.setdefault(exam_bundle_id, _Loads())
+            loads.in_flight += 1
+            generation = loads.generation
+        value = _MISSING
+        try:
+            value = load()
+        finally:
+            with _loads_lock:
+                loads.in_flight -= 1
+                if loads.in_flight == 0:
+                    del _loads[exam_bundle_id]
+                # A reader that loaded before an edit committed must not re-cache the old value after its invalidation
+                if value is not _MISSING and loads.generation == generation:
+                    cache.set(exam_bundle_id, value)
+    return value
+
+
+def get_answer_key(db: Session, exam_bundle_id: UUID) -> Dict[UUID, str]:
+    """Returns the bundle's answer key, reading the questions table only on a cache miss."""
+    return _cached(answer_keys, exam_bundle_id, lambda: load_bundle_answer_key(db, exam_bundle_id))
+
+
+def get_paper(db: Session, exam_bundle_id: UUID) -> bytes:
+    """
+    Returns the bundle's question paper as ready-to-send JSON bytes. It is validated and
+    serialized once per bundle version (and TTL), not once per student starting the exam.
+    """
+    def load() -> bytes:
+        questions = db.execute(
+            select(Question)
+            .join(exam_bundle_questions, exam_bundle_questions.c.question_id == Question.id)
+            .where(exam_bundle_questions.c.exam_bundle_id == exam_bundle_id)
+            .order_by(Question.subject_id, Question.id)
+        ).scalars().all()
+        return _paper_adapter.dump_json(_paper_adapter.validate_python(questions, from_attributes=True))
+
+    return _cached(papers, exam_bundle_id, load)
+
+
+def bundle_ids_for_question(db: Session, question_id: UUID) -> List[UUID]:
+    stmt = select(exam_bundle_questions.c.exam_bundle_id).where(exam_bundle_questions.c.question_id == question_id)
+    return list(db.execute(stmt).scalars())
+
+
+def invalidate_bundle(exam_bundle_id: UUID) -> None:
+    with _loads_lock:
+        loads = _loads.get(exam_bundle_id)
+        if loads is not None:
+            loads.generation += 1
+        answer_keys.pop(exam_bundle_id)
+        papers.pop(exam_bundle_id)
+
+
+def invalidate_bundles(exam_bundle_ids: List[UUID]) -> None:
+    for exam_bundle_id in exam_bundle_ids:
+        invalidate_bundle(exam_bundle_id)
@@ -0,0 +1,175 @@
+"""
+Grades exam attempts still in progress past their deadline (plus DEADLINE_GRACE_SECONDS) with
+whatever answers were saved, so abandoned attempts stop blocking new starts.
+
+Each worker sweeps every DEADLINE_SWEEP_INTERVAL_SECONDS (or run `python -m app.cli
+sweep-deadlines` from cron). A batch is one transaction with a fixed number of statements: the
+expired attempts come off the partial deadline index with FOR UPDATE SKIP LOCKED (concurrent
+sweepers split the backlog, and an attempt being submitted right now is left to its submit),
+their stored answers are loaded together, graded in memory, written back in one upsert, and
+the attempts marked GRADED in one executemany UPDATE.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base import AsyncSessionLocal
+from app.core.metrics import Histogram
+from app.core.settings import settings
+from app.models.student_answer import StudentAnswer
+from app.models.student_exam_attempt import StudentExamAttempt, ExamAttemptStatus, IN_PROGRESS_PREDICATE
+from app.utils import answer_buffer, bundle_cache
+from app.utils.grading import grade_submission, upsert_answer_rows
+
+logger = logging.getLogger(__name__)
+
+
+def expired(cutoff: datetime):
+    # The literal predicate (not a bound enum parameter) is what lets Postgres match the partial index
+    return (IN_PROGRESS_PREDICATE, StudentExamAttempt.deadline < cutoff)
+
+
+def past_deadline(deadline: Optional[datetime]) -> bool:
+    """Whether answers for an attempt with this deadline are refused (grace included)."""
+    if deadline is None:
+        return False
+    return datetime.now(timezone.utc) > _aware(deadline) + timedelta(seconds=settings.DEADLINE_GRACE_SECONDS)
+
+
+class SweepMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram()
+        self.sweeps = 0
+        self.failures = 0
+        self.graded = 0
+        self.last_graded = 0
+        self.backlog = 0  # expired attempts waiting when the last sweep began
+        self.overdue_seconds: Optional[float] = None  # how long past its cutoff the oldest of them was
+
+
+class DeadlineSweeper:
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.metrics = SweepMetrics()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # Random first delay so workers started together don't all sweep in the same second
+        await asyncio.sleep(random.uniform(0, settings.DEADLINE_SWEEP_INTERVAL_SECONDS))
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Deadline sweep failed")
+            await asyncio.sleep(settings.DEADLINE_SWEEP_INTERVAL_SECONDS)
+
+    async def sweep(self) -> int:
+        """Grades every expired attempt, batch by batch; returns how many were graded."""
+        started = time.perf_counter()
+        graded = 0
+        try:
+            if settings.AUTOSAVE_WRITE_BEHIND:
+                await answer_buffer.buffer.flush()  # this worker's unsaved answers count too
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.DEADLINE_GRACE_SECONDS)
+            async with self.session_factory() as db:
+                backlog, oldest = (await db.execute(
+                    select(func.count(), func.min(StudentExamAttempt.deadline)).where(*expired(cutoff))
+                )).one()
+                await db.commit()
+                while True:
+                    count = await self._grade_batch(db, cutoff)
+                    graded += count
+                    if count < settings.DEADLINE_SWEEP_BATCH:
+                        break
+        except Exception:
+            self.metrics.failures += 1
+            raise
+        finally:
+            self.metrics.duration_ms.observe((time.perf_counter() - started) * 1000)
+
+        self.metrics.sweeps += 1
+        self.metrics.graded += graded
+        self.metrics.last_graded = graded
+        self.metrics.backlog = backlog
+        self.metrics.overdue_seconds = (cutoff - _aware(oldest)).total_seconds() if oldest is not None else None
+        if graded:
+            logger.info("Deadline sweep graded %d expired exam attempts", graded)
+        return graded
+
+    async def _grade_batch(self, db: AsyncSession, cutoff: datetime) -> int:
+        attempts = (await db.execute(
+            select(StudentExamAttempt.id, StudentExamAttempt.exam_bundle_id, StudentExamAttempt.deadline)
+            .where(*expired(cutoff))
+            .order_by(StudentExamAttempt.deadline)
+            .limit(settings.DEADLINE_SWEEP_BATCH)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not attempts:
+            await db.commit()
+            return 0
+
+        answers = defaultdict(list)
+        for row in await db.execute(
+            select(StudentAnswer.student_exam_attempt_id, StudentAnswer.question_id, StudentAnswer.selected_answer)
+            .where(StudentAnswer.student_exam_attempt_id.in_([attempt.id for attempt in attempts]))
+        ):
+            answers[row.student_exam_attempt_id].append(row)
+        answer_keys = {
+            bundle_id: await db.run_sync(bundle_cache.get_answer_key, bundle_id)
+            for bundle_id in {attempt.exam_bundle_id for attempt in attempts}
+        }
+
+        answer_rows, attempt_rows = [], []
+        for attempt in attempts:
+            grading = grade_submission(answer_keys[attempt.exam_bundle_id], answers[attempt.id])
+            answer_rows += [{"student_exam_attempt_id": attempt.id, **row} for row in grading.rows]
+            attempt_rows.append({
+                "id": attempt.id,
+                "score": grading.score,
+                "status": ExamAttemptStatus.GRADED,
+                "submission_time": attempt.deadline,  # auto-submitted at the deadline
+            })
+
+        await db.run_sync(upsert_answer_rows, StudentAnswer, "student_exam_attempt_id", answer_rows)
+        await db.execute(update(StudentExamAttempt), attempt_rows)
+        await db.commit()
+        return len(attempts)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.DEADLINE_SWEEPER,
+            "sweeps": self.metrics.sweeps,
+            "failures": self.metrics.failures,
+            "graded": self.metrics.graded,
+            "last_graded": self.metrics.last_graded,
+            "backlog": self.metrics.backlog,
+            "overdue_seconds": self.metrics.overdue_seconds,
+            "duration_ms": self.metrics.duration_ms.snapshot(),
+        }
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite (the load-test stand-in) hands back naive datetimes; they were written as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+sweeper = DeadlineSweeper()
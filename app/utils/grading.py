@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List
+from uuid import UUID
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.exam_bundle import exam_bundle_questions
+from app.models.question import Question
+
+
+def normalize_answer(value: Any) -> str:
+    """Canonical string form used on both sides of an answer comparison."""
+    return str(value).strip()
+
+
+@dataclass
+class GradingResult:
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    score: float = 0.0
+
+
+# ===================> answer keys <===================
+def load_bundle_answer_key(db: Session, exam_bundle_id: UUID) -> Dict[UUID, str]:
+    """Loads {question_id: normalized answer} for every question of a bundle in one query."""
+    stmt = (
+        select(Question.id, Question.answer)
+        .join(exam_bundle_questions, exam_bundle_questions.c.question_id == Question.id)
+        .where(exam_bundle_questions.c.exam_bundle_id == exam_bundle_id)
+    )
+    return {question_id: normalize_answer(answer) for question_id, answer in db.execute(stmt)}
+
+
+def load_answer_key(db: Session, question_ids: Iterable[UUID]) -> Dict[UUID, str]:
+    """Loads {question_id: normalized answer} for an explicit list of questions in one query."""
+    question_ids = [UUID(str(qid)) for qid in question_ids]
+    if not question_ids:
+        return {}
+    stmt = select(Question.id, Question.answer).where(Question.id.in_(question_ids))
+    return {question_id: normalize_answer(answer) for question_id, answer in db.execute(stmt)}
+
+
+# ===================> grading <===================
+def grade_submission(answer_key: Dict[UUID, str], submission: Iterable[Any], marks_per_question: float = 1.0) -> GradingResult:
+    """
+    Grades a submission entirely in memory against a preloaded answer key.
+    Each submitted item must expose `question_id` and `selected_answer`; callers are
+    expected to have validated membership and duplicates beforehand.
+    """
+    result = GradingResult()
+    for answer_data in submission:
+        selected_answer = str(answer_data.selected_answer)
+        is_correct = answer_key.get(answer_data.question_id) == normalize_answer(selected_answer)
+        marks_awarded = marks_per_question if is_correct else 0.0
+        result.score += marks_awarded
+        result.rows.append({
+            "question_id": answer_data.question_id,
+            "selected_answer": selected_answer,
+            "is_correct": is_correct,
+            "marks_awarded": marks_awarded,
+        })
+    return result
+
+
+def bulk_insert_answers(db: Session, model, parent_key: str, parent_id: UUID, rows: List[Dict[str, Any]]) -> None:
+    """Writes all graded rows for one attempt/session with a single executemany INSERT."""
+    if not rows:
+        return
+    db.execute(insert(model), [{parent_key: parent_id, **row} for row in rows])
+
+
+# INSERT ... ON CONFLICT is dialect specific; these are the two the app runs on
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_answers(db: Session, model, parent_key: str, parent_id: UUID, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert-or-update of one attempt/session's answer rows keyed on (parent, question_id), in a
+    single statement. Replaying the same rows is a no-op, so clients can retry freely; the last
+    write for a question wins. Every column present in the rows is overwritten on conflict.
+    """
+    upsert_answer_rows(db, model, parent_key, [{parent_key: parent_id, **row} for row in rows])
+
+
+def upsert_answer_rows(db: Session, model, parent_key: str, rows: List[Dict[str, Any]]) -> None:
+    """upsert_answers for rows that carry their own parent key (a batch spanning many attempts)."""
+    if not rows:
+        return
+    # One row per (parent, question) (a statement can't update the same row twice), in a fixed
+    # order so overlapping batches lock their rows in the same order and can't deadlock
+    latest = {(row[parent_key], row["question_id"]): row for row in rows}
+    rows = [latest[key] for key in sorted(latest, key=lambda key: (str(key[0]), str(key[1])))]
+
+    stmt = UPSERT_INSERTS[db.get_bind().dialect.name](model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[parent_key, "question_id"],
+        set_={
+            **{column: stmt.excluded[column] for column in rows[0] if column not in (parent_key, "question_id")},
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, rows)
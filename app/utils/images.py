@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.core.settings import settings
+
+# Rendition name -> longest edge in px, smallest first
+COVER_SIZES = {"icon": 64, "thumb": 300}
+# Encoder name -> mime type; WebP for clients that accept it, JPEG for everyone else
+COVER_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+# Pillow releases the GIL while decoding/resampling/encoding, so threads keep the
+# event loop free without paying to pickle image bytes into a process pool
+image_executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image")
+
+
+def rendition_name(size: str, fmt: str) -> str:
+    return f"{size}.{fmt}"
+
+
+def render_renditions(content: bytes) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Decodes an uploaded image once and encodes every COVER_SIZES x COVER_FORMATS
+    rendition. Returns {"thumb.webp": (bytes, "image/webp"), ...}.
+    Blocking and CPU-bound: submit it to image_executor.
+    Raises ValueError for anything Pillow can't decode or that is too large.
+    """
+    try:
+        source = Image.open(BytesIO(content))
+        # Only the header has been read so far: refuse huge canvases before decoding them
+        if source.width * source.height > settings.MAX_COVER_PIXELS:
+            raise ValueError("Image dimensions are too large")
+        # JPEG sources can be decoded straight at a reduced scale
+        source.draft("RGB", (max(COVER_SIZES.values()),) * 2)
+        source.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(str(exc)) from exc
+
+    renditions = {}
+    for size_name, edge in COVER_SIZES.items():
+        resized = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+        resized.thumbnail((edge, edge))
+        for fmt, mime in COVER_FORMATS.items():
+            out = BytesIO()
+            if fmt == "jpeg":
+                resized.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+            else:
+                resized.save(out, format="WEBP", quality=80)
+            renditions[rendition_name(size_name, fmt)] = (out.getvalue(), mime)
+    return renditions
+
+
+def pick_rendition(width: Optional[int], accept: Optional[str]) -> Tuple[str, str]:
+    """Smallest size covering `width` (largest when unset), WebP when the client accepts it."""
+    size_name = next(
+        (name for name, edge in COVER_SIZES.items() if width is not None and edge >= width),
+        list(COVER_SIZES)[-1],
+    )
+    fmt = "webp" if accept and "image/webp" in accept else "jpeg"
+    return size_name, fmt
+
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Session
+
+# Keyset pagination over (created_at, id): every model inherits both from CommonModel and the pair is
+# unique and stable. With a (created_at, id) index on the listed table (declared on each paginated
+# model), `WHERE (created_at, id) > (:c, :i) ORDER BY created_at, id LIMIT n` is an index range scan
+# that reads n rows on page 1 and page 1000 alike; without one it sorts the whole table every page.
+# Listings that also filter (a bundle's questions) still sort their matches. Cursors are opaque to
+# clients; the next one travels in a header so listing endpoints can keep returning plain JSON arrays.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class PageParams:
+    """Query parameters shared by every listing endpoint: `page: PageParams = Depends()`."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Offset paging; use `cursor` instead"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.skip = skip
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def keyset(stmt: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """Orders `stmt` by (created_at, id), starts after `cursor` and fetches one extra row to detect a next page."""
+    stmt = stmt.order_by(model.created_at, model.id).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*decode_cursor(cursor)))
+    return stmt
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trims the look-ahead row; returns (page, next_cursor or None on the last page)."""
+    page = list(rows[:limit])
+    if len(rows) <= limit:
+        return page, None
+    return page, encode_cursor(page[-1].created_at, page[-1].id)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def paginate(db: Session, stmt: Select, model, page: PageParams, response: Response) -> List[Any]:
+    """Sync-session shorthand: runs the page query, sets the next-cursor header and returns the rows."""
+    if page.skip is not None and not page.cursor:
+        # Deprecated offset paging for old clients: same ordering, and the cursor header lets them switch over
+        response.headers["Deprecation"] = "true"
+        stmt = stmt.order_by(model.created_at, model.id).offset(page.skip).limit(page.limit + 1)
+    else:
+        stmt = keyset(stmt, model, page.cursor, page.limit)
+    rows, next_cursor = split_page(db.execute(stmt).scalars().all(), page.limit)
+    set_next_cursor(response, next_cursor)
+    return rows
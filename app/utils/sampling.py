@@ -0,0 +1,86 @@
+import random
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.models.question import Question
+
+# Question ids are uuid4, i.e. uniformly random keys, so the ids that follow a random pivot in
+# primary-key order are a cheap stand-in for a random pick: each seek below is an index seek plus
+# LIMIT, so the cost depends on `n`, not on the bank size. It is an approximation, not a uniform
+# sample: ids come in runs of neighbours, and a question's chance depends on the key gap before
+# it. Taking ceil(n / SAMPLE_RUN) short runs from independent pivots, instead of one window of n,
+# keeps neighbours from always landing on the same paper and averages the gaps out.
+SAMPLE_RUN = 5
+
+# {group: (filters, n)} -> {group: picked ids}
+Groups = Dict[Hashable, Tuple[List[ColumnElement], int]]
+
+
+def _seek(filters: List[ColumnElement], pivot: UUID, n: int, wrapped: bool, exclude: Sequence[UUID] = ()):
+    after_pivot = Question.id < pivot if wrapped else Question.id >= pivot
+    if exclude:
+        filters = [*filters, Question.id.notin_(exclude)]
+    return select(Question.subject_id, Question.id).where(*filters, after_pivot).order_by(Question.id).limit(n)
+
+
+def _collect(db: Session, seeks: List[tuple], groups: Groups, picked: Dict[Hashable, List[UUID]]) -> None:
+    """Runs every (group, seek) as one UNION ALL and adds new ids to their group, up to its n."""
+    if not seeks:
+        return
+    subqueries = [seek.subquery() for _, seek in seeks]
+    stmt = union_all(*(select(literal(i).label("seek"), subquery.c.id) for i, subquery in enumerate(subqueries)))
+    seen = {group: set(ids) for group, ids in picked.items()}
+    for seek_no, question_id in sorted(db.execute(stmt), key=lambda row: row.seek):
+        group = seeks[seek_no][0]
+        if len(picked[group]) < groups[group][1] and question_id not in seen[group]:
+            picked[group].append(question_id)
+            seen[group].add(question_id)
+
+
+def _sample(db: Session, groups: Groups) -> Dict[Hashable, List[UUID]]:
+    """
+    Picks up to n ids per group in at most two queries: one UNION ALL of SAMPLE_RUN-row runs after
+    random pivots, then, for groups left short (overlapping runs, pivots near the end of the key
+    space, or a small pool), one more pivot per group read forwards and wrapped around, skipping
+    ids already picked. Groups with fewer matches than n come back with all of them.
+    """
+    picked: Dict[Hashable, List[UUID]] = {group: [] for group in groups}
+    runs = [
+        (group, _seek(filters, uuid4(), SAMPLE_RUN, wrapped=False))
+        for group, (filters, n) in groups.items()
+        for _ in range(-(-n // SAMPLE_RUN))
+    ]
+    _collect(db, runs, groups, picked)
+
+    top_ups = []
+    for group, (filters, n) in groups.items():
+        missing = n - len(picked[group])
+        if missing > 0:
+            pivot = uuid4()
+            top_ups += [
+                (group, _seek(filters, pivot, missing, wrapped=False, exclude=picked[group])),
+                (group, _seek(filters, pivot, missing, wrapped=True, exclude=picked[group])),
+            ]
+    _collect(db, top_ups, groups, picked)
+    return picked
+
+
+def sample_question_ids(db: Session, filters: Iterable[ColumnElement], n: int) -> List[UUID]:
+    """Picks up to `n` distinct question ids matching `filters`, spread over the bank, without scanning it."""
+    ids = _sample(db, {None: (list(filters), n)})[None]
+    # runs come back in key order; shuffle so the paper order is random too
+    random.shuffle(ids)
+    return ids
+
+
+def sample_question_ids_per_subject(db: Session, counts: Dict[UUID, int]) -> Dict[UUID, List[UUID]]:
+    """
+    Picks counts[subject_id] question ids for every subject at once, the same way as
+    sample_question_ids: one UNION ALL of every subject's runs, plus one more for subjects
+    left short. Subjects without enough questions come back short; the caller decides.
+    """
+    return _sample(db, {subject_id: ([Question.subject_id == subject_id], n) for subject_id, n in counts.items()})
@@ -0,0 +1,64 @@
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.models.exam_bundle import ExamBundle
+from app.models.question import Question
+from app.models.student_class import StudentClass
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.constant.globals import UserRole
+
+# Single entry: (computed_at monotonic, counts). Short TTL, and create/delete endpoints
+# call invalidate_counts() so the dashboard sees their effect on its next poll.
+_COUNTS_KEY = "counts"
+_counts_cache = TTLCache(ttl=settings.USER_COUNTS_CACHE_TTL_SECONDS, maxsize=1)
+
+
+def _scalar_count(model):
+    return select(func.count()).select_from(model).scalar_subquery()
+
+
+def load_counts(db: Session) -> Dict[str, int]:
+    """
+    All dashboard counts in one round trip: users grouped by role (no joins to the
+    students/teachers/admins tables), with the other tables as scalar subqueries.
+    """
+    stmt = select(
+        User.role,
+        func.count(),
+        _scalar_count(ExamBundle).label("total_exams"),
+        _scalar_count(Question).label("total_questions"),
+        _scalar_count(Subject).label("total_subjects"),
+        _scalar_count(StudentClass).label("total_classes"),
+    ).group_by(User.role)
+
+    table_totals = ("total_exams", "total_questions", "total_subjects", "total_classes")
+    rows = db.execute(stmt).all()
+    by_role: Dict[UserRole, int] = {row.role: row[1] for row in rows}
+    return {
+        "total_students": by_role.get(UserRole.STUDENT, 0),
+        "total_teachers": by_role.get(UserRole.TEACHER, 0),
+        "total_admins": by_role.get(UserRole.ADMIN, 0),
+        "total_users": sum(by_role.values()),
+        # every row carries the same subquery values; no rows only before the initial admin exists
+        **{key: rows[0]._mapping[key] if rows else 0 for key in table_totals},
+    }
+
+
+def get_counts(db: Session) -> Tuple[Dict[str, int], float]:
+    """Returns (counts, age in seconds of the cached value)."""
+    entry = _counts_cache.get(_COUNTS_KEY)
+    if entry is None:
+        entry = (time.monotonic(), load_counts(db))
+        _counts_cache.set(_COUNTS_KEY, entry)
+    computed_at, counts = entry
+    return counts, time.monotonic() - computed_at
+
+
+def invalidate_counts() -> None:
+    _counts_cache.clear()
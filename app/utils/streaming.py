@@ -0,0 +1,95 @@
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.storage import BlobStore
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None when the header is absent or not something we serve partially
+    (other units, multiple ranges, garbage) - the caller then sends the whole body.
+    Raises ValueError when the range is well formed but unsatisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("empty suffix range")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("range starts past the end of the blob")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def iter_blob(store: BlobStore, key: str, start: int, length: int) -> Iterator[bytes]:
+    with store.open(key) as blob:
+        blob.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = blob.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def blob_response(request: Request, store: BlobStore, key: str, size: int, media_type: str,
+                  cache_control: str = "private, max-age=0, must-revalidate") -> Response:
+    """
+    Streams a blob in CHUNK_SIZE pieces with ETag/If-None-Match and single-range
+    support. Blob keys are content hashes, so the key doubles as a strong ETag.
+    """
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": cache_control}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_blob(store, key, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        iter_blob(store, key, start, length),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -23,7 +23,7 @@ def test_create_admin_by_admin_success(client: TestClient, db: Session, admin_au
         # Add other fields from AdminCreate schema if any (e.g. is_super_admin)
         # Current AdminCreate schema: email, password, first_name, last_name
     }
-    response = client.post(f"{API_V1_STR}/admin/create_admin", headers=admin_auth_headers, json=payload)
+    response = client.post(f"{API_V1_STR}/admin/create", headers=admin_auth_headers, json=payload)
     assert response.status_code == 201, response.text
     data = response.json()
     assert data["email"] == unique_email
@@ -39,10 +39,10 @@ def test_create_admin_by_teacher_fails(client: TestClient, teacher_auth_headers:
         "email": unique_email, "password": "password123",
         "first_name": "AttemptT", "last_name": "AdminT"
     }
-    response = client.post(f"{API_V1_STR}/admin/create_admin", headers=teacher_auth_headers, json=payload)
+    response = client.post(f"{API_V1_STR}/admin/create", headers=teacher_auth_headers, json=payload)
     # The get_current_admin_user dependency will raise a 403 if the role is not ADMIN
     assert response.status_code == 403, response.text
-    assert "Only admins can perform this action" in response.json()["detail"] # Or similar message from get_current_admin_user
+    assert "Only admins are allowed" in response.json()["detail"] # Or similar message from get_current_admin_user
 
 def test_create_admin_by_student_fails(client: TestClient, student_auth_headers: dict):
     unique_email = f"newadmin_s_{uuid4().hex[:6]}@example.com"
@@ -50,17 +50,17 @@ def test_create_admin_by_student_fails(client: TestClient, student_auth_headers:
         "email": unique_email, "password": "password123",
         "first_name": "AttemptS", "last_name": "AdminS"
     }
-    response = client.post(f"{API_V1_STR}/admin/create_admin", headers=student_auth_headers, json=payload)
+    response = client.post(f"{API_V1_STR}/admin/create", headers=student_auth_headers, json=payload)
     assert response.status_code == 403, response.text
-    assert "Only admins can perform this action" in response.json()["detail"] # Or similar message from get_current_admin_user
+    assert "Only admins are allowed" in response.json()["detail"] # Or similar message from get_current_admin_user
 
 def test_create_admin_duplicate_email(client: TestClient, db: Session, admin_auth_headers: dict):
     email1 = f"admin_dup_email_{uuid4().hex[:6]}@example.com"
     payload1 = {"email": email1, "password": "pw1", "first_name": "F1", "last_name": "L1"}
-    response1 = client.post(f"{API_V1_STR}/admin/create_admin", headers=admin_auth_headers, json=payload1)
+    response1 = client.post(f"{API_V1_STR}/admin/create", headers=admin_auth_headers, json=payload1)
     assert response1.status_code == 201
 
     payload2 = {"email": email1, "password": "pw2", "first_name": "F2", "last_name": "L2"}
-    response2 = client.post(f"{API_V1_STR}/admin/create_admin", headers=admin_auth_headers, json=payload2)
+    response2 = client.post(f"{API_V1_STR}/admin/create", headers=admin_auth_headers, json=payload2)
     assert response2.status_code == 400, response2.text # From the User.email unique constraint
     assert "Email already registered" in response2.json()["detail"] # Endpoint specific check
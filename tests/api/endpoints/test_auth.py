@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.endpoints.user.functions import get_password_hash
+from app.core import hashing
+from app.core.dependencies import get_db
+from app.core.settings import settings
+from app.main import app
+from app.models.student import Student
+from app.utils.constant.globals import UserRole
+
+API_V1_STR = "/api/v1"
+
+# Fixtures from conftest: client, db, admin_auth_headers
+
+
+@pytest.fixture(scope="function")
+def student_with_password(db: Session) -> Student:
+    student = Student(email="login_student@example.com", password=get_password_hash("correct horse"),
+                      role=UserRole.STUDENT, admin_no="LOGIN001")
+    db.add(student)
+    db.commit()
+    db.refresh(student)
+    return student
+
+
+def test_login_verifies_on_hashing_pool(client: TestClient, admin_auth_headers: dict, student_with_password: Student):
+    before = client.get(f"{API_V1_STR}/metrics/hashing", headers=admin_auth_headers).json()["duration_ms"]["count"]
+
+    response = client.post(f"{API_V1_STR}/login", json={"email": student_with_password.email, "password": "correct horse"})
+    assert response.status_code == 200, response.text
+    assert response.json()["access_token"]
+
+    response = client.post(f"{API_V1_STR}/login", json={"email": student_with_password.email, "password": "wrong"})
+    assert response.status_code == 401
+
+    stats = client.get(f"{API_V1_STR}/metrics/hashing", headers=admin_auth_headers).json()
+    assert stats["duration_ms"]["count"] == before + 2
+    assert stats["in_flight"] == 0
+
+
+def test_login_upgrades_outdated_hash(client: TestClient, db: Session, student_with_password: Student, monkeypatch):
+    old_hash = student_with_password.password
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(hashing, "pwd_context", hashing._build_context())
+
+    response = client.post(f"{API_V1_STR}/login", json={"email": student_with_password.email, "password": "correct horse"})
+    assert response.status_code == 200, response.text
+
+    db.refresh(student_with_password)
+    assert student_with_password.password != old_hash
+    assert student_with_password.password.startswith("$2b$05$")
+
+
+def test_login_refused_when_hashing_queue_full(client: TestClient, student_with_password: Student, monkeypatch):
+    # no queue and no workers: every hash is over the limit
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", -settings.PASSWORD_HASH_WORKERS)
+
+    response = client.post(f"{API_V1_STR}/login", json={"email": student_with_password.email, "password": "correct horse"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_concurrent_signups_hash_off_the_event_loop(db: Session, monkeypatch):
+    signups, hash_seconds = 4, 0.5
+
+    # A deliberately slow hash: if signup hashed on the event loop, the loop would stall for it
+    def slow_hash(password):
+        time.sleep(hash_seconds)
+        return f"slow${password}"
+
+    monkeypatch.setattr(hashing.pwd_context, "hash", slow_hash)
+
+    # one session per request, since these requests really do run at the same time
+    sessions = sessionmaker(bind=db.get_bind())
+
+    def session_per_request():
+        with sessions() as session:
+            yield session
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, session_per_request)
+
+    async def sign_up_while_watching_the_loop():
+        longest_stall = 0.0
+
+        async def watch():
+            nonlocal longest_stall
+            while True:
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                longest_stall = max(longest_stall, time.perf_counter() - before - 0.01)
+
+        watcher = asyncio.create_task(watch())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post(f"{API_V1_STR}/users/", json={"email": f"signup{i}@example.com", "password": "pw"})
+                for i in range(signups)
+            ))
+        watcher.cancel()
+        return responses, longest_stall
+
+    responses, longest_stall = asyncio.run(sign_up_while_watching_the_loop())
+    assert [response.status_code for response in responses] == [200] * signups, [r.text for r in responses]
+    assert len({response.json()["id"] for response in responses}) == signups
+    assert longest_stall < hash_seconds / 2, f"the event loop stalled for {longest_stall:.2f}s"
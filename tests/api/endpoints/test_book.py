@@ -0,0 +1,235 @@
+import asyncio
+import httpx
+import pytest
+import threading
+import time
+from io import BytesIO
+from PIL import Image
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.dependencies import get_db
+from app.core.storage import BlobStore, get_blob_store
+from app.main import app
+from app.models.book import Book
+from app.models.user import User
+from app.utils import images
+
+API_V1_STR = "/api/v1"
+
+# Fixtures from conftest: client, db, test_teacher_user
+
+PDF_BYTES = b"%PDF-1.4\n" + bytes(range(256)) * 1024
+
+
+@pytest.fixture(scope="function")
+def test_book_with_pdf(db: Session, test_teacher_user: User) -> Book:
+    blob = get_blob_store().put(PDF_BYTES)
+    book = Book(name="Physics", uploaded_by_id=test_teacher_user.id,
+                pdf_key=blob.key, pdf_size=blob.size, pdf_mime="application/pdf")
+    db.add(book)
+    db.commit()
+    db.refresh(book)
+    return book
+
+
+def test_get_pdf_streams_whole_file_with_etag(client: TestClient, test_book_with_pdf: Book):
+    response = client.get(f"{API_V1_STR}/book/{test_book_with_pdf.id}/pdf")
+    assert response.status_code == 200, response.text
+    assert response.content == PDF_BYTES
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == f'"{test_book_with_pdf.pdf_key}"'
+    assert int(response.headers["content-length"]) == len(PDF_BYTES)
+
+
+def test_get_pdf_range_returns_partial_content(client: TestClient, test_book_with_pdf: Book):
+    url = f"{API_V1_STR}/book/{test_book_with_pdf.id}/pdf"
+
+    response = client.get(url, headers={"Range": "bytes=100-1099"})
+    assert response.status_code == 206, response.text
+    assert response.content == PDF_BYTES[100:1100]
+    assert response.headers["content-range"] == f"bytes 100-1099/{len(PDF_BYTES)}"
+
+    response = client.get(url, headers={"Range": "bytes=-10"})
+    assert response.status_code == 206, response.text
+    assert response.content == PDF_BYTES[-10:]
+
+    response = client.get(url, headers={"Range": f"bytes={len(PDF_BYTES)}-"})
+    assert response.status_code == 416, response.text
+    assert response.headers["content-range"] == f"bytes */{len(PDF_BYTES)}"
+
+
+def test_get_pdf_if_none_match_returns_304(client: TestClient, test_book_with_pdf: Book):
+    url = f"{API_V1_STR}/book/{test_book_with_pdf.id}/pdf"
+    etag = client.get(url).headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # a stale If-Range validator falls back to the full body
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PDF_BYTES
+
+
+def cover_png() -> bytes:
+    source = BytesIO()
+    Image.new("RGB", (900, 1200), (20, 90, 160)).save(source, format="PNG")
+    return source.getvalue()
+
+
+@pytest.fixture(scope="function")
+def test_book_with_cover(db: Session, test_teacher_user: User) -> Book:
+    renditions = {}
+    for name, (data, mime) in images.render_renditions(cover_png()).items():
+        blob = get_blob_store().put(data)
+        renditions[name] = {"key": blob.key, "size": blob.size, "mime": mime}
+    default = renditions["thumb.jpeg"]
+    book = Book(name="Chemistry", uploaded_by_id=test_teacher_user.id, cover_renditions=renditions,
+                cover_image_key=default["key"], cover_image_size=default["size"], cover_image_mime=default["mime"])
+    db.add(book)
+    db.commit()
+    db.refresh(book)
+    return book
+
+
+def test_get_cover_image_picks_rendition(client: TestClient, test_book_with_cover: Book):
+    url = f"{API_V1_STR}/book/{test_book_with_cover.id}/cover_image"
+
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/jpeg"
+    assert max(Image.open(BytesIO(response.content)).size) == images.COVER_SIZES["thumb"]
+    assert response.headers["vary"] == "Accept"
+
+    response = client.get(url, params={"size": 48}, headers={"Accept": "image/webp,*/*"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/webp"
+    assert max(Image.open(BytesIO(response.content)).size) == images.COVER_SIZES["icon"]
+
+
+def test_render_renditions_rejects_non_images():
+    with pytest.raises(ValueError):
+        images.render_renditions(b"definitely not an image")
+
+
+def test_blob_store_backends_must_implement_the_storage_methods():
+    class Incomplete(BlobStore):
+        def put(self, data):
+            ...
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_release_waits_for_an_upload_of_the_same_blob(db: Session, test_teacher_user: User):
+    from app.api.endpoints.book.book import _release_blobs, _save_blob_refs, _set_pdf
+
+    store = get_blob_store()
+    key = store.put(PDF_BYTES).key  # still on disk from a book that was just deleted
+    with Session(db.get_bind()) as uploader, Session(db.get_bind()) as releaser:
+        book = Book(name="Biology", uploaded_by_id=test_teacher_user.id)
+        _set_pdf(uploader, book, PDF_BYTES)
+        uploader.add(book)
+        _save_blob_refs(uploader, book)
+
+        release = threading.Thread(target=_release_blobs, args=(releaser, [key]))
+        release.start()
+        release.join(timeout=0.5)
+        assert release.is_alive()  # waiting on the upload's lock instead of deleting the blob
+
+        uploader.commit()
+        release.join(timeout=5)
+        assert not release.is_alive()
+    assert store.exists(key)
+
+
+def test_release_keeps_blobs_still_used_as_renditions(db: Session, test_book_with_cover: Book):
+    from app.api.endpoints.book.book import _release_blobs, _save_blob_refs
+
+    _save_blob_refs(db, test_book_with_cover)
+    db.commit()
+    icon_key = test_book_with_cover.cover_renditions["icon.webp"]["key"]
+    _release_blobs(db, [icon_key, "0" * 64])
+    assert get_blob_store().exists(icon_key)
+
+
+def test_failed_book_save_releases_the_blobs_it_stored(db: Session, test_teacher_user: User):
+    from app.api.endpoints.book.book import _releasing_on_failure, _set_pdf
+
+    content = b"%PDF-1.4\nnever saved"
+    book = Book(name="Biology", uploaded_by_id=test_teacher_user.id)
+    with pytest.raises(RuntimeError):
+        with _releasing_on_failure(db, book):
+            _set_pdf(db, book, content)
+            assert get_blob_store().exists(BlobStore.key_for(content))
+            raise RuntimeError("commit failed")
+    assert not get_blob_store().exists(BlobStore.key_for(content))
+
+
+def test_delete_waits_for_a_concurrent_upload_of_the_same_cover_off_the_event_loop(
+    db: Session, teacher_auth_headers: dict, test_book_with_cover: Book, monkeypatch
+):
+    put_seconds = 0.5
+    store = get_blob_store()
+    put, uploading = type(store).put, asyncio.Event()
+
+    # A slow store: the upload holds its shared blob locks from the first put until it commits
+    def slow_put(self, data):
+        loop.call_soon_threadsafe(uploading.set)
+        time.sleep(put_seconds)
+        return put(self, data)
+
+    monkeypatch.setattr(type(store), "put", slow_put)
+
+    # one session per request, since these requests really do run at the same time; lock waits
+    # give up after a few seconds, so a handler that waited on the event loop fails, not hangs
+    engine = create_engine(db.get_bind().url, connect_args={"options": "-c lock_timeout=5000"})
+    sessions = sessionmaker(bind=engine)
+
+    def session_per_request():
+        with sessions() as session:
+            yield session
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, session_per_request)
+    shared_keys = [rendition["key"] for rendition in test_book_with_cover.cover_renditions.values()]
+
+    async def upload_and_delete_while_watching_the_loop():
+        nonlocal loop
+        loop = asyncio.get_running_loop()
+        longest_stall = 0.0
+
+        async def watch():
+            nonlocal longest_stall
+            while True:
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                longest_stall = max(longest_stall, time.perf_counter() - before - 0.01)
+
+        async def delete_once_uploading():
+            # the same cover, so the same content-addressed blobs: the release has to wait
+            await uploading.wait()
+            return await client.delete(f"{API_V1_STR}/book/delete/{test_book_with_cover.id}", headers=teacher_auth_headers)
+
+        watcher = asyncio.create_task(watch())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.wait_for(asyncio.gather(
+                client.post(
+                    f"{API_V1_STR}/book/create", headers=teacher_auth_headers,
+                    data={"name": "Chemistry, 2nd edition"}, files={"cover_image": ("cover.png", cover_png(), "image/png")},
+                ),
+                delete_once_uploading(),
+            ), timeout=30)
+        watcher.cancel()
+        return responses, longest_stall
+
+    loop = None
+    (created, deleted), longest_stall = asyncio.run(upload_and_delete_while_watching_the_loop())
+    engine.dispose()
+
+    assert created.status_code == 201, created.text
+    assert deleted.status_code == 200, deleted.text
+    assert all(store.exists(key) for key in shared_keys)  # now the new book's cover
+    assert longest_stall < put_seconds / 2, f"the event loop stalled for {longest_stall:.2f}s"
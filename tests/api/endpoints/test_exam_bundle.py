@@ -52,6 +52,39 @@ def test_create_exam_bundle_as_admin(
     assert len(bundle_in_db.questions) == 8
     assert len(bundle_in_db.student_classes) == 1
 
+def test_create_exam_bundle_assembles_in_constant_round_trips(
+    client: TestClient,
+    db: Session,
+    admin_auth_headers: dict,
+    captured_statements: list,
+    test_subject1: Subject,
+    test_subject2: Subject,
+    test_class1: StudentClass,
+    test_class2: StudentClass,
+    test_questions_s1: list[Question],
+    test_questions_s2: list[Question]
+):
+    admin_user = db.query(User).filter(User.email == "admin@example.com").first()
+    payload = {
+        "name": "Mock",
+        "time_in_mins": "PT60M",
+        "is_active": True,
+        "subject_combinations": {str(test_subject1.id): 10, str(test_subject2.id): 7},  # every question in both banks
+        "class_ids": [str(test_class1.id), str(test_class2.id)],
+        "uploaded_by_id": str(admin_user.id)
+    }
+    captured_statements.clear()
+
+    response = client.post("/api/v1/exam_bundle/create", headers=admin_auth_headers, json=payload)
+
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert {q["id"] for q in data["questions"]} == {str(q.id) for q in test_questions_s1 + test_questions_s2}
+    # no per-subject/per-class lookups and no per-question association INSERTs
+    question_link_inserts = [s for s in captured_statements if s.lstrip().upper().startswith("INSERT INTO EXAM_BUNDLE_QUESTIONS")]
+    assert len(question_link_inserts) == 1
+    assert not [s for s in captured_statements if "random()" in s.lower()]
+
 def test_create_exam_bundle_as_teacher(
     client: TestClient,
     db: Session,
@@ -153,6 +186,7 @@ def test_get_exam_bundle(
     client: TestClient,
     db: Session,
     admin_auth_headers: dict, # Using admin for creation, but any authenticated user should be able to fetch
+    test_teacher_user: User,
     test_subject1: Subject,
     test_class1: StudentClass,
     test_questions_s1: list[Question]
@@ -172,8 +206,8 @@ def test_get_exam_bundle(
 
     # Fetch using teacher credentials to show other roles can also fetch
     teacher_user = db.query(User).filter(User.email == "teacher@example.com").first()
-    from app.api.endpoints.user.auth import create_access_token
-    teacher_token = create_access_token(data={"sub": str(teacher_user.id)})
+    from app.api.endpoints.user.functions import create_access_token, token_claims
+    teacher_token = create_access_token(data=token_claims(teacher_user))
     headers = {"Authorization": f"Bearer {teacher_token}"}
 
     response = client.get(f"/api/v1/exam_bundle/{bundle_id}", headers=headers)
@@ -188,7 +222,8 @@ def test_get_all_exam_bundles(
     admin_auth_headers: dict,
     test_subject1: Subject,
     test_class1: StudentClass,
-    test_questions_s1: list[Question]
+    test_questions_s1: list[Question],
+    query_budget
 ):
     admin_user = db.query(User).filter(User.email == "admin@example.com").first()
     # Create a couple of bundles
@@ -202,7 +237,9 @@ def test_get_all_exam_bundles(
     }).raise_for_status() # Ensure creation succeeded
 
 
-    response = client.get("/api/v1/exam_bundle/all", headers=admin_auth_headers)
+    # summaries with the question count inline: no per-bundle queries
+    with query_budget(2):
+        response = client.get("/api/v1/exam_bundle/all", headers=admin_auth_headers)
     assert response.status_code == 200, response.text
     data = response.json()
     # This assertion depends on the test isolation. With Base.metadata.drop_all/create_all per test, it should be 2.
@@ -214,6 +251,40 @@ def test_get_all_exam_bundles(
     assert "Bundle 2" in bundle_names
 
 
+def test_exam_bundle_listing_uses_summary_and_questions_are_paginated(
+    client: TestClient,
+    db: Session,
+    admin_auth_headers: dict,
+    test_subject1: Subject,
+    test_class1: StudentClass,
+    test_questions_s1: list[Question]
+):
+    admin_user = db.query(User).filter(User.email == "admin@example.com").first()
+    bundle_id = client.post("/api/v1/exam_bundle/create", headers=admin_auth_headers, json={
+        "name": "Paged Bundle", "time_in_mins": "PT10M", "is_active": True,
+        "subject_combinations": {str(test_subject1.id): 7}, "class_ids": [str(test_class1.id)], "uploaded_by_id": str(admin_user.id)
+    }).json()["id"]
+
+    response = client.get("/api/v1/exam_bundle/all", headers=admin_auth_headers)
+    assert response.status_code == 200, response.text
+    summary = response.json()[0]
+    assert summary["question_count"] == 7
+    assert "questions" not in summary
+
+    seen, cursor = [], None
+    for _ in range(3):  # 3 + 3 + 1
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/v1/exam_bundle/{bundle_id}/questions", headers=admin_auth_headers, params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(q["id"] for q in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+    assert cursor is None
+    assert len(seen) == len(set(seen)) == 7
+
+    response = client.get(f"/api/v1/exam_bundle/{bundle_id}/questions", headers=admin_auth_headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
 def test_update_exam_bundle_as_admin(
     client: TestClient,
     db: Session,
@@ -399,4 +470,22 @@ def test_create_exam_bundle_with_old_questions_per_subject_fails(
     response = client.post("/api/v1/exam_bundle/create", headers=admin_auth_headers, json=payload)
     assert response.status_code == 422, response.text # Unprocessable Entity for Pydantic validation error
     assert "questions_per_subject" in response.text # Check that the error message mentions the field
-    assert "extra fields not permitted" in response.text.lower() # Pydantic v2 error message style
+    assert "extra inputs are not permitted" in response.text.lower() # Pydantic v2 error message style
+
+
+def test_sample_question_ids_per_subject_takes_runs_from_independent_pivots(
+    db: Session, test_subject1: Subject, test_subject2: Subject,
+    test_questions_s1: list[Question], test_questions_s2: list[Question], monkeypatch
+):
+    from app.utils import sampling
+
+    monkeypatch.setattr(sampling, "SAMPLE_RUN", 2)
+    s1 = sorted(q.id for q in test_questions_s1)
+    s2 = sorted(q.id for q in test_questions_s2)
+    # two runs for subject 1, one for subject 2 (pivots are drawn in that order)
+    pivots = iter([s1[0], s1[6], s2[3]])
+    monkeypatch.setattr(sampling, "uuid4", lambda: next(pivots))
+
+    picked = sampling.sample_question_ids_per_subject(db, {test_subject1.id: 4, test_subject2.id: 2})
+    assert set(picked[test_subject1.id]) == {s1[0], s1[1], s1[6], s1[7]}
+    assert set(picked[test_subject2.id]) == {s2[3], s2[4]}
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+API_V1_STR = "/api/v1"
+
+# Fixtures from conftest: client, admin_auth_headers, student_auth_headers
+
+def test_pool_metrics_as_admin(client: TestClient, admin_auth_headers: dict):
+    response = client.get(f"{API_V1_STR}/metrics/pool", headers=admin_auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert "sync" in data
+    for key in ("size", "checked_out", "overflow", "timeouts", "wait_ms"):
+        assert key in data["sync"]
+    assert "+Inf" in data["sync"]["wait_ms"]["buckets"]
+
+def test_pool_metrics_as_student_fails(client: TestClient, student_auth_headers: dict):
+    response = client.get(f"{API_V1_STR}/metrics/pool", headers=student_auth_headers)
+    assert response.status_code == 403, response.text
+
+def test_server_timing_reports_request_queries(client: TestClient, admin_auth_headers: dict):
+    response = client.get(f"{API_V1_STR}/subject/all", headers=admin_auth_headers)
+    assert response.status_code == 200, response.text
+    db_timing = response.headers["server-timing"].split(",")[0]
+    assert db_timing.startswith('db;desc="')
+    # at least the listing query itself
+    assert int(db_timing.split('"')[1].split()[0]) >= 1
+
+def test_slow_queries_logged_with_route(client: TestClient, admin_auth_headers: dict, caplog, monkeypatch):
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    with caplog.at_level("WARNING", logger="app.slow_query"):
+        client.get(f"{API_V1_STR}/subject/all", headers=admin_auth_headers)
+    messages = [record.getMessage() for record in caplog.records if record.name == "app.slow_query"]
+    assert any('"route": "/api/v1/subject/all"' in message for message in messages)
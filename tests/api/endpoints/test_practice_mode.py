@@ -17,6 +17,7 @@ from app.schemas.practice_session import PracticeSessionSchema
 from app.schemas.question import QuestionSchema
 from app.utils.constant.globals import UserRole, QuestionType
 from app.core.dependencies import get_db # For create_question_for_practice helper
+from app.utils.sampling import sample_question_ids
 
 # Fixtures from conftest: client, db, test_student_user, student_auth_headers,
 # test_subject1, test_subject2, test_questions_s1, test_questions_s2, (these might not be used if questions_for_practice_filters is comprehensive)
@@ -107,6 +108,7 @@ def questions_for_practice_filters(client: TestClient, db: Session, admin_auth_h
 
 # --- Tests ---
 
+@pytest.mark.query_budget(5)
 def test_start_practice_session_no_filters(
     client: TestClient, student_auth_headers: dict, student_user_setup: Student, questions_for_practice_filters: list
 ):
@@ -123,6 +125,7 @@ def test_start_practice_session_no_filters(
     assert data["session"]["filter_question_type"] is None
     assert data["session"]["filter_year"] is None
 
+@pytest.mark.query_budget(5)
 def test_start_practice_session_with_filters(
     client: TestClient, student_auth_headers: dict, student_user_setup: Student,
     questions_for_practice_filters: list, test_subject1: Subject
@@ -158,6 +161,32 @@ def test_start_practice_session_with_filters(
         # This test doesn't check q_data['year'] though. Let's add it if crucial.
         # For now, checking filters on session is primary.
 
+def test_sample_question_ids_is_distinct_and_bounded(db: Session, questions_for_practice_filters: list, test_subject1: Subject):
+    filters = [Question.subject_id == test_subject1.id, Question.type == QuestionType.JAMB, Question.year == 2022]
+    for _ in range(5):  # different random pivots, including ones that need to wrap around
+        sampled = sample_question_ids(db, filters, 60)
+        assert len(sampled) == 60
+        assert len(set(sampled)) == 60
+        assert set(sampled) <= {q.id for q in questions_for_practice_filters}
+
+    # fewer matches than requested: every match comes back exactly once
+    sampled = sample_question_ids(db, [Question.type == QuestionType.NECO, Question.year == 2020], 60)
+    assert len(sampled) == len(set(sampled)) == 1
+
+def test_sample_question_ids_takes_short_runs_from_independent_pivots(
+    db: Session, questions_for_practice_filters: list, test_subject1: Subject, monkeypatch
+):
+    from app.utils import sampling
+
+    filters = [Question.subject_id == test_subject1.id, Question.type == QuestionType.JAMB, Question.year == 2022]
+    ordered = sorted(q.id for q in questions_for_practice_filters if q.question_text.startswith("S1 JAMB 2022"))
+    pivots = iter([ordered[0], ordered[35]])
+    monkeypatch.setattr(sampling, "uuid4", lambda: next(pivots))
+
+    sampled = sample_question_ids(db, filters, 2 * sampling.SAMPLE_RUN)
+    # two runs far apart in key order, not one window of neighbours
+    assert set(sampled) == set(ordered[:sampling.SAMPLE_RUN]) | set(ordered[35:35 + sampling.SAMPLE_RUN])
+
 def test_start_practice_session_no_questions_found(
     client: TestClient, student_auth_headers: dict, student_user_setup: Student, questions_for_practice_filters: list
 ):
@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timezone
+from uuid import uuid4
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.associations import exam_bundle_student_classes_association
+from app.models.book import Book, book_blobs
+from app.models.exam_bundle import ExamBundle, exam_bundle_questions
+from app.models.practice_session import PracticeSession
+from app.models.question import Question
+from app.models.student import Student
+from app.models.student_answer import StudentAnswer
+from app.models.student_exam_attempt import StudentExamAttempt, ExamAttemptStatus
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.deadline_sweeper import expired
+from app.utils.pagination import encode_cursor, keyset
+from app.utils.constant.globals import QuestionType
+from app.utils.sampling import _seek
+
+# Fixtures from conftest: db
+#
+# The test tables are tiny, so the planner would rightly pick sequential scans; with seqscan
+# disabled these tests assert that each hot query's shape *can* use its index, which is what
+# regresses when a filter or the index definition drifts.
+
+
+def plan_for(db: Session, stmt) -> str:
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = db.execute(text(f"EXPLAIN {sql}")).scalars().all()
+    db.rollback()
+    return "\n".join(rows)
+
+
+student_id, bundle_id, subject_id, class_id = uuid4(), uuid4(), uuid4(), uuid4()
+
+HOT_QUERIES = {
+    "uq_student_exam_attempts_in_progress": select(StudentExamAttempt.id).where(
+        StudentExamAttempt.student_id == student_id,
+        StudentExamAttempt.exam_bundle_id == bundle_id,
+        StudentExamAttempt.status == ExamAttemptStatus.IN_PROGRESS,
+    ),
+    "ix_student_exam_attempts_student_id_start_time": select(StudentExamAttempt)
+        .where(StudentExamAttempt.student_id == student_id)
+        .order_by(StudentExamAttempt.start_time.desc()),
+    "ix_student_exam_attempts_in_progress_deadline": select(StudentExamAttempt.id)
+        .where(*expired(datetime.now(timezone.utc)))
+        .order_by(StudentExamAttempt.deadline)
+        .limit(500),
+    "uq_student_answers_attempt_question": select(StudentAnswer)
+        .where(StudentAnswer.student_exam_attempt_id.in_([uuid4(), uuid4()])),
+    "ix_practice_sessions_student_id_start_time": select(PracticeSession)
+        .where(PracticeSession.student_id == student_id)
+        .order_by(PracticeSession.start_time.desc()),
+    "ix_questions_subject_id_id": _seek([Question.subject_id == subject_id], uuid4(), 25, wrapped=False),
+    "ix_questions_subject_id_type_year_id": _seek(
+        [Question.subject_id == subject_id, Question.type == QuestionType.JAMB, Question.year == 2022],
+        uuid4(), 60, wrapped=False,
+    ),
+    "ix_students_student_class_id": select(Student.id).where(Student.student_class_id == class_id),
+    "ix_exam_bundle_questions_question_id": select(exam_bundle_questions.c.exam_bundle_id)
+        .where(exam_bundle_questions.c.question_id == uuid4()),
+    "ix_exam_bundle_student_classes_student_class_id": select(ExamBundle.id)
+        .join(exam_bundle_student_classes_association,
+              exam_bundle_student_classes_association.c.exam_bundle_id == ExamBundle.id)
+        .where(exam_bundle_student_classes_association.c.student_class_id == class_id),
+    "ix_books_created_at_id": keyset(select(Book), Book, encode_cursor(datetime.now(timezone.utc), uuid4()), 100),
+    "ix_users_created_at_id": keyset(select(User), User, encode_cursor(datetime.now(timezone.utc), uuid4()), 100),
+    "book_blobs_pkey": select(book_blobs.c.key).where(book_blobs.c.key.in_(["a" * 64, "b" * 64])),
+}
+
+
+@pytest.fixture
+def question_bank(db: Session):
+    """
+    Analyzed questions spread over types and years: on empty tables both question indexes cost
+    the same, and the planner's pick between them would be arbitrary.
+    """
+    db.add(Subject(id=subject_id, name="Planner"))
+    db.flush()
+    db.add_all(
+        Question(subject_id=subject_id, question_text=f"Q{i}", options={"A": "1"}, answer="A",
+                 type=list(QuestionType)[i % len(QuestionType)], year=2000 + i % 25)
+        for i in range(1000)
+    )
+    db.commit()
+    db.execute(text("ANALYZE questions"))
+    db.commit()
+
+
+@pytest.mark.parametrize("index_name", list(HOT_QUERIES))
+def test_hot_query_uses_index(db: Session, index_name: str, request):
+    if index_name.startswith("ix_questions_"):
+        request.getfixturevalue("question_bank")
+    plan = plan_for(db, HOT_QUERIES[index_name])
+    assert index_name in plan, plan
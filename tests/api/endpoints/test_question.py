@@ -0,0 +1,63 @@
+import re
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.question import Question
+
+API_V1_STR = "/api/v1"
+
+# Fixtures from conftest: client, db, captured_statements, test_questions_s1, admin_auth_headers
+
+# A blob column in a SELECT list, as opposed to the `... IS NOT NULL` used for has_* flags
+BLOB_COLUMN = re.compile(r"(questions\.question_image|users\.profile_picture)(?!\s+IS NOT NULL)")
+
+
+def test_list_endpoints_never_select_blob_columns(
+    client: TestClient, captured_statements: list, test_questions_s1: list, admin_auth_headers: dict
+):
+    for path in ("/question/all", f"/question/{test_questions_s1[0].id}", "/users/", "/student/all", "/teacher/all"):
+        response = client.get(f"{API_V1_STR}{path}", headers=admin_auth_headers)
+        assert response.status_code == 200, (path, response.text)
+
+    selects = [s for s in captured_statements if s.lstrip().upper().startswith("SELECT")]
+    assert selects
+    assert not [s for s in selects if BLOB_COLUMN.search(s)]
+
+
+def test_question_image_served_from_deferred_column(client: TestClient, db: Session, test_questions_s1: list):
+    question = test_questions_s1[0]
+    question.question_image = b"\xff\xd8\xff\xe0 fake jpeg"
+    db.commit()
+
+    response = client.get(f"{API_V1_STR}/question/{question.id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["has_question_image"] is True
+
+    response = client.get(f"{API_V1_STR}/question/{question.id}/image")
+    assert response.status_code == 200
+    assert response.content == b"\xff\xd8\xff\xe0 fake jpeg"
+
+    response = client.get(f"{API_V1_STR}/question/{test_questions_s1[1].id}/image")
+    assert response.status_code == 404
+
+
+def test_read_questions_cursor_pagination(client: TestClient, test_questions_s1: list):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"{API_V1_STR}/question/all", params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(q["id"] for q in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == 3
+    assert sorted(seen) == sorted(str(q.id) for q in test_questions_s1)
+
+    # deprecated offset paging still works, in the same order
+    response = client.get(f"{API_V1_STR}/question/all", params={"skip": 4, "limit": 4})
+    assert response.status_code == 200, response.text
+    assert [q["id"] for q in response.json()] == seen[4:8]
+    assert response.headers["Deprecation"] == "true"
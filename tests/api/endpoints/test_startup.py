@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import INIT_DB_LOCK_KEY, advisory_lock
+from app.core.settings import Settings
+
+# Fixtures from conftest: db
+
+# Every worker imports app.main; it must not touch the database or the filesystem, and it
+# has to stay quick so workers (re)start fast. Generous for slow CI machines; it's ~1s locally.
+IMPORT_BUDGET_SECONDS = 4.0
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+def test_app_import_is_fast_and_side_effect_free(tmp_path):
+    env = {
+        **os.environ,
+        # Nothing listens here: any connection attempt during import fails the import
+        "DATABASE_URL": "postgresql://nobody@127.0.0.1:1/unreachable",
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+    }
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    elapsed = time.perf_counter() - started
+
+    assert result.returncode == 0, result.stderr
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"importing app.main took {elapsed:.2f}s"
+    assert not (tmp_path / "uploads").exists()
+
+
+def test_blob_store_dir_follows_upload_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("BLOB_STORE_DIR", raising=False)
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+    assert Settings(_env_file=None).BLOB_STORE_DIR == tmp_path / "uploads" / "blobs"
+
+    monkeypatch.setenv("BLOB_STORE_DIR", str(tmp_path / "elsewhere"))
+    assert Settings(_env_file=None).BLOB_STORE_DIR == tmp_path / "elsewhere"
+
+
+def test_init_db_lock_excludes_other_sessions(db: Session):
+    engine = db.get_bind()
+    with engine.connect() as holder, engine.connect() as other:
+        with advisory_lock(holder, INIT_DB_LOCK_KEY):
+            assert other.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": INIT_DB_LOCK_KEY}).scalar() is False
+        assert other.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": INIT_DB_LOCK_KEY}).scalar() is True
+        other.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INIT_DB_LOCK_KEY})
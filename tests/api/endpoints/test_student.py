@@ -85,3 +85,45 @@ def test_create_student_duplicate_admin_no(client: TestClient, db: Session, admi
     response2 = client.post(f"{API_V1_STR}/student/create", headers=admin_auth_headers, json=payload2)
     assert response2.status_code == 400, response2.text
     assert "Admin number already registered" in response2.json()["detail"]
+
+def test_delete_student_revokes_cached_principal(client: TestClient, db: Session, admin_auth_headers: dict):
+    from app.api.endpoints.user.functions import user_status_cache, get_user_status
+
+    student = Student(
+        email=f"revoke_{uuid4().hex[:6]}@example.com", password="pw", role=UserRole.STUDENT,
+        admin_no=f"R{uuid4().hex[:6]}",
+    )
+    db.add(student)
+    db.commit()
+    db.refresh(student)
+
+    assert get_user_status(db, student.id) == (UserRole.STUDENT, False)
+    assert student.id in user_status_cache
+
+    response = client.delete(f"{API_V1_STR}/student/delete/{student.id}", headers=admin_auth_headers)
+    assert response.status_code == 200, response.text
+    assert student.id not in user_status_cache
+    assert get_user_status(db, student.id) is None
+
+
+def test_user_counts_cached_and_reset_on_create(client: TestClient, admin_auth_headers: dict, test_student_user: User):
+    url = f"{API_V1_STR}/users/count"
+    first = client.get(url, headers=admin_auth_headers)
+    assert first.status_code == 200, first.text
+    assert first.json()["total_students"] >= 1
+    assert "cache_age_seconds" in first.json()
+
+    payload = {
+        "email": f"countstudent_{uuid4().hex[:6]}@example.com",
+        "password": "password123",
+        "first_name": "Count",
+        "last_name": "Student",
+        "admin_no": f"S{uuid4().hex[:6]}"
+    }
+    response = client.post(f"{API_V1_STR}/student/create", headers=admin_auth_headers, json=payload)
+    assert response.status_code == 201, response.text
+
+    # creating a student drops the cached counts, so the next read is fresh
+    second = client.get(url, headers=admin_auth_headers).json()
+    assert second["total_students"] == first.json()["total_students"] + 1
+    assert second["total_users"] == first.json()["total_users"] + 1
@@ -1,21 +1,31 @@
 import pytest
-from typing import Generator, Any
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Generator, Any, List, Optional
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 from alembic.config import Config
 from alembic import command
 
 from app.main import app # Assuming app.main.app is your FastAPI instance
-from app.core.database import Base, get_db
-from app.core.settings import settings
+from app.core.database import Base
+from app.core.settings import settings, to_async_url
+from app.core.dependencies import get_db, get_async_db
+from app.core.query_stats import instrument_engine
 from app.models.user import User
+from app.models.admin import Admin
+from app.models.teacher import Teacher
+from app.models.student import Student
+from app.core.hashing import hash_password
 from app.models.subject import Subject
 from app.models.student_class import StudentClass
 from app.models.question import Question
 from app.utils.constant.globals import UserRole, QuestionType
-from app.api.endpoints.user.auth import create_access_token # For creating tokens
+from app.api.endpoints.user.functions import create_access_token, token_claims # For creating tokens
 
 # Use a separate test database
 TEST_DATABASE_URL = settings.DATABASE_URL + "_test"
@@ -23,6 +33,89 @@ TEST_DATABASE_URL = settings.DATABASE_URL + "_test"
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async routers get their own engine; NullPool because every TestClient runs its own event loop
+async_engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# The lifespan's deadline sweeper would use the app database; tests drive a DeadlineSweeper
+# on the test database directly
+settings.DEADLINE_SWEEPER = False
+
+# Same per-request query accounting (Server-Timing, slow-query log) as the app engines
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n): fail if any request made by the test body issues more than n SQL statements",
+    )
+
+
+class QueryBudget:
+    """
+    Records the SQL statements issued while each TestClient request is in flight and
+    fails the test when one goes over the active budget. The budget comes from the
+    test's `query_budget` marker (requests made by fixtures during setup are not
+    checked) or from `with query_budget(n):` around specific calls.
+    """
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.requests: List[tuple] = []  # (method, url, statements)
+        self._current: Optional[List[str]] = None
+
+    def __call__(self, limit: int):
+        return self._limited(limit)
+
+    @contextmanager
+    def _limited(self, limit: int):
+        previous, self.limit = self.limit, limit
+        try:
+            yield self
+        finally:
+            self.limit = previous
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current is not None:
+            self._current.append(statement)
+
+    def wrap(self, client: TestClient) -> TestClient:
+        send = client.request
+
+        def request(method, url, *args, **kwargs):
+            self._current = []
+            try:
+                return send(method, url, *args, **kwargs)
+            finally:
+                statements, self._current = self._current, None
+                self.requests.append((method, str(url), statements))
+                if self.limit is not None and len(statements) > self.limit:
+                    listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(statements, 1))
+                    pytest.fail(
+                        f"{method} {url} issued {len(statements)} SQL statements, budget is {self.limit}:\n{listing}",
+                        pytrace=False,
+                    )
+
+        client.request = request
+        return client
+
+
+query_budget_key = pytest.StashKey[QueryBudget]()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # The marker budget only covers the test body, not the fixtures that seed data through the API
+    budget = item.stash.get(query_budget_key, None)
+    marker = item.get_closest_marker("query_budget")
+    if budget is None or marker is None:
+        yield
+        return
+    with budget(marker.args[0]):
+        yield
+
 @pytest.fixture(scope="session", autouse=True)
 def apply_migrations():
     # Run alembic migrations
@@ -45,24 +138,60 @@ def db() -> Generator[Session, Any, None]:
         Base.metadata.drop_all(bind=engine) # Drop tables after each test function
 
 @pytest.fixture(scope="function")
-def client(db: Session) -> Generator[TestClient, Any, None]:
+def query_budget(request) -> Generator[QueryBudget, Any, None]:
+    budget = QueryBudget()
+    request.node.stash[query_budget_key] = budget
+    listener = budget.before_cursor_execute  # one bound-method object, so event.remove finds it
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", listener)
+    yield budget
+    for target in engines:
+        event.remove(target, "before_cursor_execute", listener)
+
+@pytest.fixture(scope="function")
+def client(db: Session, query_budget: QueryBudget) -> Generator[TestClient, Any, None]:
     def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
+        # The test's own session: the db fixture closes it, so fixture objects stay attached
+        yield db
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
-        yield c
+        yield query_budget.wrap(c)
     del app.dependency_overrides[get_db] # Clean up
+    del app.dependency_overrides[get_async_db]
+
+@pytest.fixture(scope="function")
+def async_session_factory() -> async_sessionmaker:
+    """Async sessions on the test database, for code that opens its own (e.g. the autosave flusher)."""
+    return TestingAsyncSessionLocal
+
+@pytest.fixture(scope="function")
+def captured_statements() -> Generator[list, Any, None]:
+    """Collects the SQL text of every statement the sync and async test engines execute."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for target in engines:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
 
 # --- Test Data Fixtures ---
 @pytest.fixture(scope="function")
 def test_admin_user(db: Session) -> User:
-    admin = User(
+    admin = Admin(
         email="admin@example.com",
-        password="adminpassword", # In a real scenario, hash this
+        password=hash_password("adminpassword"),
         role=UserRole.ADMIN,
         first_name="Admin",
         last_name="User"
@@ -74,9 +203,9 @@ def test_admin_user(db: Session) -> User:
 
 @pytest.fixture(scope="function")
 def test_teacher_user(db: Session) -> User:
-    teacher = User(
+    teacher = Teacher(
         email="teacher@example.com",
-        password="teacherpassword",
+        password=hash_password("teacherpassword"),
         role=UserRole.TEACHER,
         first_name="Teacher",
         last_name="User"
@@ -88,10 +217,11 @@ def test_teacher_user(db: Session) -> User:
 
 @pytest.fixture(scope="function")
 def test_student_user(db: Session) -> User:
-    student = User(
+    student = Student(
         email="student@example.com",
-        password="studentpassword",
-        role=UserRole.USER, # Assuming USER is student role
+        password=hash_password("studentpassword"),
+        role=UserRole.STUDENT,
+        admin_no="ADM-0001",
         first_name="Student",
         last_name="User"
     )
@@ -100,20 +230,24 @@ def test_student_user(db: Session) -> User:
     db.refresh(student)
     return student
 
+def login_headers(user: User) -> dict:
+    """Authorization header carrying the same token /login would issue for this user."""
+    access_token = create_access_token(
+        data=token_claims(user), expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
 @pytest.fixture(scope="function")
 def admin_auth_headers(test_admin_user: User) -> dict:
-    access_token = create_access_token(data={"sub": str(test_admin_user.id)})
-    return {"Authorization": f"Bearer {access_token}"}
+    return login_headers(test_admin_user)
 
 @pytest.fixture(scope="function")
 def teacher_auth_headers(test_teacher_user: User) -> dict:
-    access_token = create_access_token(data={"sub": str(test_teacher_user.id)})
-    return {"Authorization": f"Bearer {access_token}"}
+    return login_headers(test_teacher_user)
 
 @pytest.fixture(scope="function")
 def student_auth_headers(test_student_user: User) -> dict:
-    access_token = create_access_token(data={"sub": str(test_student_user.id)})
-    return {"Authorization": f"Bearer {access_token}"}
+    return login_headers(test_student_user)
 
 @pytest.fixture(scope="function")
 def test_subject1(db: Session) -> Subject: